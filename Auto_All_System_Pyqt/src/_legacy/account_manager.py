@@ -1,86 +1,181 @@
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+
 from database import DBManager
 
-DBManager.init_db()
+logger = logging.getLogger(__name__)
+
+# 待写入队列达到该长度时自动批量落库
+BULK_FLUSH_SIZE = 250
+
+# 账号行解析用的预编译正则
+_SPLIT = re.compile(r'\s*----\s*')
+
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _ensure_init():
+    """首次写库前再初始化数据库，避免 import 本模块时就触发磁盘 I/O"""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            DBManager.init_db()
+            _initialized = True
+
+
+@dataclass
+class _Queue:
+    """待写入队列，按列存储（每个字段一个列表），落库时直接 zip 成参数行"""
+    emails: list = field(default_factory=list)
+    pwds: list = field(default_factory=list)
+    recs: list = field(default_factory=list)
+    secs: list = field(default_factory=list)
+    links: list = field(default_factory=list)
+    statuses: list = field(default_factory=list)
+
+    def append(self, email, pwd, rec, sec, link, status):
+        self.emails.append(email)
+        self.pwds.append(pwd)
+        self.recs.append(rec)
+        self.secs.append(sec)
+        self.links.append(link)
+        self.statuses.append(status)
+
+    def __len__(self):
+        return len(self.emails)
+
 
 class AccountManager:
+    _pending = _Queue()
+    _pending_lock = threading.Lock()
+    # 批量模式嵌套深度按线程记录：只有打开 batch() 的线程推迟写库，其他线程照常立即落库
+    _batch = threading.local()
+
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _parse(line):
-        parts = [p.strip() for p in line.split('----') if p.strip()]
+        # 纯函数且返回不可变元组，同一行在多次状态流转中只解析一次
+        # 不含 '@' 的行（空行、注释、表头）不可能有邮箱，直接返回
+        if not line or '@' not in line:
+            return None, None, None, None, None
+        
         link = None
         email = None
         pwd = None
         rec = None
         sec = None
+        first = True
         
-        # Check URL
-        if parts and "http" in parts[0]:
-            link = parts[0]
-            parts = parts[1:]
-            
-        # Find email
-        for i, p in enumerate(parts):
-            if '@' in p and '.' in p:
-                email = p
-                if i+1 < len(parts): pwd = parts[i+1]
-                if i+2 < len(parts): rec = parts[i+2]
-                if i+3 < len(parts): sec = parts[i+3]
+        # 单次遍历：首段为链接时记为 link，找到邮箱后依次填充 pwd/rec/sec
+        for tok in _SPLIT.split(line.strip()):
+            if not tok:
+                continue
+            if email is None:
+                # 与旧版判定保持一致：首段含 http 即为链接，含 '@' 和 '.' 即为邮箱
+                if first and 'http' in tok:
+                    link = tok
+                elif '@' in tok and '.' in tok:
+                    email = tok
+                first = False
+            elif pwd is None:
+                pwd = tok
+            elif rec is None:
+                rec = tok
+            else:
+                sec = tok
                 break
         
         return email, pwd, rec, sec, link
 
     @staticmethod
-    def save_link(line):
-        """保存到 link_ready 状态（有资格待验证已提取链接）"""
-        print(f"[AM] save_link 调用, line: {line[:100] if line else 'None'}...")
+    def _enqueue(line, status):
+        """解析并加入待写入队列，返回是否解析出邮箱"""
         email, pwd, rec, sec, link = AccountManager._parse(line)
-        if email:
-            DBManager.upsert_account(email, pwd, rec, sec, link, status='link_ready')
-            DBManager.export_to_files()
-        else:
-            print(f"[AM] save_link: 无法解析邮箱，跳过")
+        if not email:
+            return False
+        with AccountManager._pending_lock:
+            AccountManager._pending.append(email, pwd, rec, sec, link, status)
+            size = len(AccountManager._pending)
+        if getattr(AccountManager._batch, 'depth', 0) == 0 or size >= BULK_FLUSH_SIZE:
+            AccountManager.flush()
+        return True
 
     @staticmethod
-    def move_to_verified(line):
-        """移动到 verified 状态（已验证未绑卡）- 保存完整字段"""
-        print(f"[AM] move_to_verified 调用")
-        email, pwd, rec, sec, link = AccountManager._parse(line)
-        if email:
-            # 使用 upsert 而不是 update_status，确保保存所有字段
-            DBManager.upsert_account(email, pwd, rec, sec, link, status='verified')
-            DBManager.export_to_files()
+    def flush():
+        """将待写入队列批量 upsert 到数据库，导出由 DBManager 防抖合并"""
+        with AccountManager._pending_lock:
+            q = AccountManager._pending
+            AccountManager._pending = _Queue()
+        if not q:
+            return 0
+        
+        _ensure_init()
+        # 每行带各自状态一次写入，按队列顺序执行，同一邮箱的先后顺序不变；
+        # 字段与状态都和库中一致的行不会更新，也不触发导出
+        changed = DBManager.bulk_upsert_columns(q.emails, q.pwds, q.recs, q.secs, q.links, q.statuses)
+        if changed:
+            DBManager.mark_export_dirty(changed)
+        return len(changed)
 
     @staticmethod
-    def move_to_ineligible(line):
-        """移动到 ineligible 状态（无资格）"""
-        print(f"[AM] move_to_ineligible 调用")
-        email, pwd, rec, sec, link = AccountManager._parse(line)
-        if email:
-            DBManager.upsert_account(email, pwd, rec, sec, link, status='ineligible')
-            DBManager.export_to_files()
-        else:
-            print(f"[AM] move_to_ineligible: 无法解析邮箱，跳过")
+    @contextmanager
+    def batch():
+        """
+        批量模式：块内的状态变更只入队，退出时一次批量 upsert + 一次导出
+        （只对当前线程生效）
+        
+        用法:
+            with AccountManager.batch():
+                for line in lines:
+                    AccountManager.move_to_verified(line)
+        """
+        batch = AccountManager._batch
+        batch.depth = getattr(batch, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            batch.depth -= 1
+            if batch.depth == 0:
+                AccountManager.flush()
+                DBManager.flush_exports()
 
     @staticmethod
-    def move_to_error(line):
-        """移动到 error 状态（超时或其他错误）"""
-        print(f"[AM] move_to_error 调用")
-        email, pwd, rec, sec, link = AccountManager._parse(line)
-        if email:
-            DBManager.upsert_account(email, pwd, rec, sec, link, status='error')
-            DBManager.export_to_files()
-        else:
-            print(f"[AM] move_to_error: 无法解析邮箱，跳过")
+    def save_many(lines, status):
+        """批量保存多行账号到指定状态（一次事务）"""
+        parsed = [AccountManager._parse(line) for line in lines]
+        with AccountManager._pending_lock:
+            q = AccountManager._pending
+            for email, pwd, rec, sec, link in parsed:
+                if email:
+                    q.append(email, pwd, rec, sec, link, status)
+        return AccountManager.flush()
 
     @staticmethod
-    def move_to_subscribed(line):
-        """移动到 subscribed 状态（已绑卡订阅）"""
-        print(f"[AM] move_to_subscribed 调用")
-        email, pwd, rec, sec, link = AccountManager._parse(line)
-        if email:
-            DBManager.upsert_account(email, pwd, rec, sec, link, status='subscribed')
-            DBManager.export_to_files()
-            
+    def _set_status(line, status):
+        """解析账号行并写入指定状态（保存完整字段，而不仅是 update_status）"""
+        logger.debug("[AM] 设置状态 %s, line: %.100s", status, line)
+        if not AccountManager._enqueue(line, status):
+            logger.warning("[AM] %s: 无法解析邮箱，跳过", status)
+
+    # link_ready:  有资格待验证已提取链接
+    # verified:    已验证未绑卡
+    # ineligible:  无资格
+    # error:       超时或其他错误
+    # subscribed:  已绑卡订阅
+    save_link = staticmethod(partial(_set_status.__func__, status='link_ready'))
+    move_to_verified = staticmethod(partial(_set_status.__func__, status='verified'))
+    move_to_ineligible = staticmethod(partial(_set_status.__func__, status='ineligible'))
+    move_to_error = staticmethod(partial(_set_status.__func__, status='error'))
+    move_to_subscribed = staticmethod(partial(_set_status.__func__, status='subscribed'))
+
     @staticmethod
     def remove_from_file_unsafe(file_key, line_or_email):
-        # No-op with DB approach, handled by status update
+        # No-op with DB approach, handled by status update（保留以兼容旧调用）
         pass
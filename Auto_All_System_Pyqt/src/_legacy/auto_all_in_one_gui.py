@@ -3,22 +3,90 @@
 """
 import sys
 import os
+import re
 import asyncio
+import logging
+import logging.handlers
+import queue
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
-                              QPushButton, QLabel, QLineEdit, QTextEdit, 
+                              QPushButton, QLabel, QLineEdit, QPlainTextEdit, 
                               QTableWidget, QTableWidgetItem, QHeaderView,
                               QMessageBox, QCheckBox, QSpinBox, QGroupBox,
                               QFormLayout)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QObject, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 from playwright.async_api import async_playwright
 from bit_api import openBrowser, closeBrowser
-from create_window import get_browser_info, get_browser_list
+from create_window import get_browser_list
 from database import DBManager
+from account_manager import AccountManager
+from auto_bind_card import check_and_login, auto_bind_card
+from run_playwright_google import check_google_one_status
 from sheerid_verifier import SheerIDVerifier
 
-class AutoAllInOneWorker(QThread):
-    """一键全自动工作线程"""
+# SheerID 批量验证：每批最多提交的 VID 数量，以及合并同批 VID 的等待窗口（秒）
+SHEERID_BATCH_SIZE = 5
+SHEERID_BATCH_WINDOW = 1.0
+
+# 日志框最多保留的行数
+LOG_MAX_LINES = 2000
+
+# 卡片使用计数：攒够该数量的成功绑卡后再在一个事务里统一写库
+CARD_USAGE_FLUSH_SIZE = 16
+
+_VID_RE = re.compile(r'verificationId=([a-zA-Z0-9]+)')
+# 数据库中缓存的链接是否是可直接提交验证的 SheerID 链接
+_SHEERID_URL_RE = re.compile(r'^https?://[\w.-]*sheerid\.com/\S*verificationId=[a-zA-Z0-9]+')
+
+logger = logging.getLogger(__name__)
+
+# 同一进程内缓存：browser_id -> CDP ws 地址（窗口全程不关闭，可跨多次运行复用）
+_ws_endpoint_cache = {}
+
+class AsyncLoopThread(QThread):
+    """常驻的 asyncio 事件循环线程，整个应用生命周期内只创建一次，各次运行通过 submit 投递协程"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        # Python 3.12+：无需等待即可完成的协程直接同步返回，省去一次事件循环调度
+        if hasattr(asyncio, 'eager_task_factory'):
+            self.loop.set_task_factory(asyncio.eager_task_factory)
+    
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def submit(self, coro):
+        """线程安全地把协程投递到事件循环，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def shutdown(self):
+        """停止事件循环并等待线程退出（应用退出时调用）"""
+        if self.isRunning():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.wait()
+        self.loop.run_until_complete(self.loop.shutdown_default_executor())
+        self.loop.close()
+
+
+_loop_thread = None
+
+
+def get_loop_thread():
+    """获取全局事件循环线程，首次调用时启动，并在应用退出时自动关闭"""
+    global _loop_thread
+    if _loop_thread is None:
+        _loop_thread = AsyncLoopThread()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_loop_thread.shutdown)
+        _loop_thread.start()
+    return _loop_thread
+
+
+class AutoAllInOneWorker(QObject):
+    """一键全自动任务（在全局事件循环线程中运行）"""
     progress_signal = pyqtSignal(str, str, str)  # browser_id, status, message
     finished_signal = pyqtSignal()
     log_signal = pyqtSignal(str)
@@ -32,66 +100,79 @@ class AutoAllInOneWorker(QThread):
         self.api_key = api_key
         self.thread_count = thread_count
         self.is_running = True
+        self._playwright = None
+        self._vid_queue = None
+        self._pending_vids = {}  # vid -> 等待验证结果的 Future
+        self._vid_browser = {}   # vid -> browser_id，用于把验证进度回传到对应行
+        self._pending_card_ids = []  # 待写库的卡片使用记录（卡片 id，可重复）
     
-    def run(self):
+    def start(self):
+        """把本次任务投递到全局事件循环线程，结束后发出 finished_signal"""
+        future = get_loop_thread().submit(self._run())
+        future.add_done_callback(lambda _: self.finished_signal.emit())
+        return future
+    
+    async def _run(self):
         try:
-            asyncio.run(self._process_all())
+            await self._process_all()
         except Exception as e:
             self.log_signal.emit(f"❌ 工作线程错误: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            self.finished_signal.emit()
+            logger.exception("工作线程错误")
     
     async def _process_all(self):
-        """处理所有账号（支持并发）"""
-        card_index = 0
-        card_usage_count = 0
-        
-        # 将账号分批处理
-        for batch_start in range(0, len(self.accounts), self.thread_count):
-            if not self.is_running:
-                break
-            
-            batch_end = min(batch_start + self.thread_count, len(self.accounts))
-            batch_accounts = self.accounts[batch_start:batch_end]
-            
-            self.log_signal.emit(f"\n{'='*50}")
-            self.log_signal.emit(f"并发处理第 {batch_start+1}-{batch_end} 个账号（共 {len(self.accounts)} 个）")
-            self.log_signal.emit(f"{'='*50}")
-            
-            # 为每个账号分配卡片和创建任务
-            tasks = []
-            for i, account in enumerate(batch_accounts):
-                global_index = batch_start + i
-                
-                # 检查是否需要切换到下一张卡
-                if card_usage_count >= self.cards_per_account:
-                    card_index += 1
-                    card_usage_count = 0
-                    self.log_signal.emit(f"💳 切换到下一张卡 (卡 #{card_index + 1})")
-                
-                # 检查卡是否用完
-                if card_index >= len(self.cards):
-                    self.log_signal.emit("⚠️ 卡片已用完，停止处理")
-                    break
-                
-                current_card = self.cards[card_index] if card_index < len(self.cards) else None
-                
-                # 创建异步任务
-                task = self._process_single_account_wrapper(
-                    account, 
-                    current_card, 
-                    global_index + 1
-                )
-                tasks.append(task)
-                
-                if current_card:
-                    card_usage_count += 1
-            
-            # 并发执行这一批
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+        """处理所有账号（支持并发：固定数量的 worker 从队列取账号，慢账号不会阻塞其他 worker）"""
+        jobs = asyncio.Queue()
+        
+        # 第 i 个账号固定使用第 i // cards_per_account 张卡，卡用完的账号不再入队
+        per_card = max(1, self.cards_per_account)
+        total = min(len(self.accounts), len(self.cards) * per_card)
+        for global_index in range(total):
+            card_index = global_index // per_card
+            if card_index and global_index % per_card == 0:
+                self.log_signal.emit(f"💳 第 {global_index + 1} 个账号起切换到下一张卡 (卡 #{card_index + 1})")
+            jobs.put_nowait((self.accounts[global_index], self.cards[card_index], global_index + 1))
+        
+        if total < len(self.accounts):
+            self.log_signal.emit("⚠️ 卡片已用完，其余账号不处理")
+        
+        self.log_signal.emit(f"\n{'='*50}")
+        self.log_signal.emit(f"并发处理 {jobs.qsize()} 个账号（共 {len(self.accounts)} 个，并发数 {self.thread_count}）")
+        self.log_signal.emit(f"{'='*50}")
+        
+        # 每个 worker 收到一个 None 后退出
+        for _ in range(self.thread_count):
+            jobs.put_nowait(None)
+        
+        self._vid_queue = asyncio.Queue()
+        dispatcher = asyncio.create_task(self._sheerid_dispatch_loop())
+        
+        try:
+            # 所有 worker 共用一个 Playwright 驱动进程，避免每个账号单独启动一次
+            async with async_playwright() as playwright:
+                self._playwright = playwright
+                workers = [asyncio.create_task(self._worker(jobs)) for _ in range(self.thread_count)]
+                # 按完成顺序逐个收集，某个 worker 异常时立即输出，而不是等全部结束
+                for finished in asyncio.as_completed(workers):
+                    try:
+                        await finished
+                    except Exception as e:
+                        self.log_signal.emit(f"❌ 并发任务异常: {e}")
+        finally:
+            # Playwright 启动失败或任务被取消时，也要停掉分发任务并写回卡片使用次数
+            dispatcher.cancel()
+            await self._flush_card_usage()
+    
+    async def _worker(self, jobs):
+        """并发 worker：循环从队列取 (account, card, index) 处理，直到取到 None"""
+        while True:
+            job = await jobs.get()
+            try:
+                if job is None:
+                    return
+                if self.is_running:
+                    await self._process_single_account_wrapper(*job)
+            finally:
+                jobs.task_done()
     
     async def _process_single_account_wrapper(self, account, card_info, index):
         """单个账号处理的包装器"""
@@ -104,21 +185,17 @@ class AutoAllInOneWorker(QThread):
         self.log_signal.emit(f"\n[{index}] 开始处理账号: {email}")
         
         try:
-            success, message = await self._process_single_account(
-                browser_id, email, card_info
-            )
+            success, message = await self._process_single_account(account, card_info)
             
             if success:
                 self.progress_signal.emit(browser_id, "✅ 完成", message)
                 self.log_signal.emit(f"[{index}] ✅ {email}: {message}")
                 
-                # 更新卡片使用计数
+                # 记录卡片使用，攒够一批后统一写库
                 if card_info and card_info.get('id'):
-                    try:
-                        from database import DBManager
-                        DBManager.increment_card_usage(card_info['id'])
-                    except Exception as e:
-                        self.log_signal.emit(f"[{index}] ⚠️ 更新卡片使用计数失败: {e}")
+                    self._pending_card_ids.append(card_info['id'])
+                    if len(self._pending_card_ids) >= CARD_USAGE_FLUSH_SIZE:
+                        await self._flush_card_usage()
             else:
                 self.progress_signal.emit(browser_id, "❌ 失败", message)
                 self.log_signal.emit(f"[{index}] ❌ {email}: {message}")
@@ -128,7 +205,17 @@ class AutoAllInOneWorker(QThread):
             self.progress_signal.emit(browser_id, "❌ 错误", error_msg)
             self.log_signal.emit(f"[{index}] ❌ {email}: {error_msg}")
     
-    async def _process_single_account(self, browser_id, email, card_info):
+    async def _flush_card_usage(self):
+        """把累积的卡片使用计数在后台线程中一次性写入数据库，不阻塞事件循环"""
+        card_ids, self._pending_card_ids = self._pending_card_ids, []
+        if not card_ids:
+            return
+        try:
+            await asyncio.to_thread(DBManager.bulk_increment_card_usage, card_ids)
+        except Exception as e:
+            self.log_signal.emit(f"⚠️ 更新卡片使用计数失败: {e}")
+    
+    async def _process_single_account(self, account, card_info):
         """
         处理单个账号的完整流程
         1. 登录
@@ -136,107 +223,136 @@ class AutoAllInOneWorker(QThread):
         3. 根据状态执行相应操作
         """
         try:
-            # 获取账号信息
-            target_browser = get_browser_info(browser_id)
-            if not target_browser:
-                return False, "无法获取浏览器信息"
-            
-            remark = target_browser.get('remark', '')
-            parts = remark.split('----')
-            
-            account_info = None
-            if len(parts) >= 4:
-                account_info = {
-                    'email': parts[0].strip(),
-                    'password': parts[1].strip(),
-                    'backup': parts[2].strip(),
-                    'secret': parts[3].strip()
-                }
+            # 账号字段已在 load_accounts 中从数据库读出，无需再请求浏览器信息并解析 remark
+            account_info = account
+            browser_id = account.get('browser_id')
+            email = account.get('email')
+            
+            # 状态为 link_ready 且数据库中已有 SheerID 链接：不开页面提取，先直接提交验证
+            # （其他状态保留的链接可能已用过，不能再提交）
+            # 验证通过后账号已是"已验证未绑卡"，登录后跳过状态检测直接绑卡；失败则走正常流程重新提取
+            pre_verified = False
+            cached_link = account.get('link', '')
+            if account.get('status') == 'link_ready' and _SHEERID_URL_RE.match(cached_link):
+                self.log_signal.emit(f"  🔗 使用已保存的 SheerID 链接直接验证...")
+                self.progress_signal.emit(browser_id, "✔️ 验证中", "使用已保存链接进行SheerID验证...")
+                pre_verified, msg = await self._verify_link(cached_link, email, browser_id)
+                if not pre_verified:
+                    self.log_signal.emit(f"  ⚠️ 已保存链接验证未通过（{msg}），改为从页面重新提取")
             
             # 打开浏览器（全程不关闭）
             self.progress_signal.emit(browser_id, "🚀 启动中", "正在打开浏览器...")
-            result = openBrowser(browser_id)
-            if not result.get('success'):
+            browser = await self._connect_browser(browser_id)
+            if not browser:
                 return False, f"打开浏览器失败"
             
-            ws_endpoint = result['data']['ws']
-            
-            async with async_playwright() as playwright:
-                try:
-                    chromium = playwright.chromium
-                    browser = await chromium.connect_over_cdp(ws_endpoint)
-                    context = browser.contexts[0]
-                    page = context.pages[0] if context.pages else await context.new_page()
-                    
-                    # 从 auto_bind_card 导入
-                    from auto_bind_card import check_and_login, auto_bind_card
-                    
-                    # Step 1: 导航到目标页面并登录检测
-                    self.log_signal.emit(f"  🔐 步骤1: 导航并登录检测...")
-                    self.progress_signal.emit(browser_id, "🔐 登录中", "正在检测登录状态...")
-                    
-                    target_url = "https://one.google.com/ai-student?g1_landing_page=75&utm_source=antigravity&utm_campaign=argon_limit_reached"
-                    
-                    # 先导航到目标页面
-                    await page.goto(target_url, wait_until='domcontentloaded', timeout=30000)
-                    await asyncio.sleep(3)
-                    
-                    # 然后检测登录
-                    login_success, login_msg = await check_and_login(page, account_info)
-                    if not login_success:
-                        return False, f"登录失败: {login_msg}"
-                    
-                    self.log_signal.emit(f"  ✅ 登录成功")
-                    self.progress_signal.emit(browser_id, "✅ 登录成功", "登录完成，准备检测状态")
+            try:
+                context = browser.contexts[0]
+                page = context.pages[0] if context.pages else await context.new_page()
+                
+                # Step 1: 导航到目标页面并登录检测
+                self.log_signal.emit(f"  🔐 步骤1: 导航并登录检测...")
+                self.progress_signal.emit(browser_id, "🔐 登录中", "正在检测登录状态...")
+                
+                target_url = "https://one.google.com/ai-student?g1_landing_page=75&utm_source=antigravity&utm_campaign=argon_limit_reached"
+                
+                # 先导航到目标页面
+                await page.goto(target_url, wait_until='domcontentloaded', timeout=30000)
+                await self._wait_settled(page, 3000)
+                
+                # 然后检测登录
+                login_success, login_msg = await check_and_login(page, account_info)
+                if not login_success:
+                    return False, f"登录失败: {login_msg}"
+                
+                self.log_signal.emit(f"  ✅ 登录成功")
+                self.progress_signal.emit(browser_id, "✅ 登录成功", "登录完成，准备检测状态")
+                
+                if pre_verified:
+                    self.progress_signal.emit(browser_id, "💳 准备绑卡", "已验证，准备绑卡...")
+                    return await self._handle_verified(page, card_info, account_info, browser_id)
+                
+                # Step 2: 状态检测
+                self.log_signal.emit(f"  🔍 步骤2: 状态检测...")
+                self.progress_signal.emit(browser_id, "🔍 检测中", "正在分析账号资格...")
+                
+                # 检测状态（check_google_one_status 自带轮询，出现状态标记即返回，无需预先等待）
+                status = await self._detect_status(page)
+                self.log_signal.emit(f"  📊 当前状态: {status}")
+                self.progress_signal.emit(browser_id, f"📊 {status}", f"状态检测完成: {status}")
+                
+                # Step 3: 根据状态执行操作
+                if status == "link_ready":
+                    # 有资格待验证 → 提取链接 → 验证 → 绑卡
+                    self.progress_signal.emit(browser_id, "🔗 提取链接", "正在提取SheerID验证链接...")
+                    return await self._handle_link_ready(page, email, card_info, browser_id)
                     
-                    # Step 2: 状态检测
-                    self.log_signal.emit(f"  🔍 步骤2: 状态检测...")
-                    self.progress_signal.emit(browser_id, "🔍 检测中", "正在分析账号资格...")
-                    await asyncio.sleep(3)
+                elif status == "verified":
+                    # 已验证未绑卡 → 直接绑卡
+                    self.progress_signal.emit(browser_id, "💳 准备绑卡", "已验证，准备绑卡...")
+                    return await self._handle_verified(page, card_info, account_info, browser_id)
                     
-                    # 检测状态（使用内联逻辑）
-                    status = await self._detect_status(page)
-                    self.log_signal.emit(f"  📊 当前状态: {status}")
-                    self.progress_signal.emit(browser_id, f"📊 {status}", f"状态检测完成: {status}")
+                elif status == "subscribed":
+                    # 已订阅
+                    return True, "账号已订阅，无需处理"
                     
-                    # Step 3: 根据状态执行操作
-                    if status == "link_ready":
-                        # 有资格待验证 → 提取链接 → 验证 → 绑卡
-                        self.progress_signal.emit(browser_id, "🔗 提取链接", "正在提取SheerID验证链接...")
-                        return await self._handle_link_ready(page, email, card_info, browser_id)
-                        
-                    elif status == "verified":
-                        # 已验证未绑卡 → 直接绑卡
-                        self.progress_signal.emit(browser_id, "💳 准备绑卡", "已验证，准备绑卡...")
-                        return await self._handle_verified(page, card_info, account_info, browser_id)
-                        
-                    elif status == "subscribed":
-                        # 已订阅
-                        return True, "账号已订阅，无需处理"
-                        
-                    elif status == "ineligible":
-                        # 无资格
-                        return False, "账号无资格"
-                        
-                    else:
-                        # 其他状态
-                        return False, f"未知状态: {status}"
+                elif status == "ineligible":
+                    # 无资格
+                    return False, "账号无资格"
                     
-                except Exception as e:
-                    import traceback
-                    traceback.print_exc()
-                    return False, str(e)
+                else:
+                    # 其他状态
+                    return False, f"未知状态: {status}"
+                
+            except Exception as e:
+                logger.exception("处理账号 %s 出错", email)
+                return False, str(e)
+            finally:
+                # 只断开 CDP 连接，浏览器窗口保持打开
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
                     
         except Exception as e:
             return False, str(e)
     
+    async def _connect_browser(self, browser_id):
+        """
+        通过 CDP 连接比特浏览器窗口（复用 _process_all 中启动的同一个 Playwright 实例）
+        优先使用缓存的 ws 地址；连接失败（窗口已关闭）再调用 openBrowser 重新打开
+        """
+        ws_endpoint = _ws_endpoint_cache.get(browser_id)
+        if ws_endpoint:
+            try:
+                return await self._playwright.chromium.connect_over_cdp(ws_endpoint, timeout=5000)
+            except Exception:
+                _ws_endpoint_cache.pop(browser_id, None)
+        
+        result = await asyncio.to_thread(openBrowser, browser_id)
+        if not result.get('success'):
+            return None
+        
+        ws_endpoint = result['data']['ws']
+        _ws_endpoint_cache[browser_id] = ws_endpoint
+        return await self._playwright.chromium.connect_over_cdp(ws_endpoint)
+    
+    @staticmethod
+    async def _wait_settled(page, timeout):
+        """
+        等待页面网络空闲，最多 timeout 毫秒（替代固定 sleep）
+        Google 页面常有长连接，可能永远达不到 networkidle，超时直接继续即可
+        """
+        try:
+            await page.wait_for_load_state('networkidle', timeout=timeout)
+        except Exception:
+            pass
+    
     async def _detect_status(self, page):
         """
         检测账号当前状态 (调用 run_playwright_google.py 统一逻辑)
         返回: link_ready, verified, subscribed, ineligible, error
         """
-        from run_playwright_google import check_google_one_status
-        
         self.log_signal.emit(f"  🔍 调用 run_playwright_google 模块进行多轮状态检测...")
         
         try:
@@ -252,8 +368,7 @@ class AutoAllInOneWorker(QThread):
             
         except Exception as e:
             self.log_signal.emit(f"  ❌ 检测出错: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("状态检测出错")
             return "error"
 
     
@@ -267,31 +382,33 @@ class AutoAllInOneWorker(QThread):
                 # 0. 直接从页面提取 SheerID 链接 (最优先)
                 # 用户反馈链接就在 a 标签中: <a href="https://services.sheerid.com/verify/..." ...>
                 # 不需要 is_visible() 检查，只要存在就提取
-                sheerid_locator = page.locator('a[href*="sheerid.com"]').first
-                if await sheerid_locator.count() > 0:
-                     link = await sheerid_locator.get_attribute("href")
+                # 查找与取 href 在浏览器端一次完成，省去 count() + get_attribute() 两次往返
+                link = await page.eval_on_selector_all(
+                    'a[href*="sheerid.com"]',
+                    'els => els.length ? els[0].getAttribute("href") : null'
+                )
+                if link:
                      self.log_signal.emit(f"  ℹ️ 直接从页面提取到 SheerID 链接")
                 
                 else:
                     # 1. 如果没提取到，才尝试点击按钮触发
                     # ... (保留点击逻辑作为后备)
-                    verify_btns = [
-                        'button:has-text("Verify eligibility")', 
-                        'button:has-text("verify your eligibility")',
-                        'a:has-text("Verify eligibility")',
-                        'div[role="button"]:has-text("Verify eligibility")',
-                        'text="Verify eligibility"', # 兜底
-                        'text="verify your eligibility"'
-                    ]
+                    # 所有候选按钮合并成一个选择器，浏览器端一次匹配出第一个可见的
+                    verify_btn = page.locator(
+                        'button:has-text("Verify eligibility"), '
+                        'button:has-text("verify your eligibility"), '
+                        'a:has-text("Verify eligibility"), '
+                        'div[role="button"]:has-text("Verify eligibility"), '
+                        ':text-is("Verify eligibility"), '  # 兜底
+                        ':text-is("verify your eligibility") '
+                        '>> visible=true'
+                    ).first
                     
                     clicked = False
-                    for selector in verify_btns:
-                        btn = page.locator(selector).first
-                        if await btn.count() > 0 and await btn.is_visible():
-                            self.log_signal.emit(f"  🖱️ 点击验证按钮: {selector}")
-                            await btn.click()
-                            clicked = True
-                            break
+                    if await verify_btn.count() > 0:
+                        self.log_signal.emit("  🖱️ 点击验证按钮")
+                        await verify_btn.click(timeout=5000)
+                        clicked = True
                     
                     if not clicked:
                         self.log_signal.emit("  ⚠️ 未找到明显的验证按钮，尝试直接寻找链接...")
@@ -311,20 +428,17 @@ class AutoAllInOneWorker(QThread):
                         link = current_url
                     else:
                         # 尝试从iframe获取
-                        frames = page.frames
-                        for frame in frames:
-                            frame_url = frame.url
-                            if "sheerid" in frame_url.lower():
-                                link = frame_url
-                                break
+                        link = next((f.url for f in page.frames if "sheerid" in f.url.lower()), None)
                     
                     if not link:
-                        # 再次尝试从页面内容中提取 (作为最后的保险)
-                        page_content = await page.content()
-                        import re
-                        sheerid_match = re.search(r'https://[^"\']*sheerid[^"\']*', page_content)
-                        if sheerid_match:
-                            link = sheerid_match.group()
+                        # 再次尝试从页面中提取 (作为最后的保险)
+                        # 在浏览器端筛选，只回传匹配的 href/src，而不是把整页 HTML 传回来做正则
+                        hrefs = await page.eval_on_selector_all(
+                            'a[href*="sheerid.com"], iframe[src*="sheerid.com"]',
+                            'els => els.map(e => e.href || e.src)'
+                        )
+                        if hrefs:
+                            link = hrefs[0]
             
             except Exception as e:
                 self.log_signal.emit(f"  ⚠️ 提取链接时出错: {e}")
@@ -337,68 +451,17 @@ class AutoAllInOneWorker(QThread):
             if browser_id: self.progress_signal.emit(browser_id, "✔️ 验证中", "已提取链接，开始SheerID验证...")
             
             # 保存链接到数据库
-            from account_manager import AccountManager
             line = f"{link}----{email}"
-            AccountManager.save_link(line)
+            await asyncio.to_thread(AccountManager.save_link, line)
             
             # Step 3b: 验证SheerID
-            self.log_signal.emit(f"  ✔️ 步骤3b: SheerID验证...")
-            
-            verifier = SheerIDVerifier(api_key=self.api_key)
-            
-            # 提取 VID 用于 verify_batch
-            import re
-            vid = link
-            if "http" in vid:
-                 match = re.search(r'verificationId=([a-zA-Z0-9]+)', link)
-                 if match: vid = match.group(1)
-            
-            # 定义实时回调函数
-            def verification_callback(callback_vid, msg):
-                # 将实时消息发送到 UI
-                # 注意：callback可能在任何线程调用，emit是线程安全的
-                if browser_id:
-                    self.progress_signal.emit(browser_id, "⏳ 验证中", f"{msg}")
-                # 也可以打印到日志
-                # self.log_signal.emit(f"    [SheerID] {msg}")
-
-            # 调用 verify_batch 并传入回调
-            # 注意：verify_batch 是同步阻塞的（内部有轮询），所以用 to_thread 放到后台执行
-            results = await asyncio.to_thread(
-                verifier.verify_batch,
-                [vid],
-                callback=verification_callback
-            )
-
-            # 处理最终结果
-            success = False
-            msg = "验证未完成"
-            
-            if vid in results:
-                res = results[vid]
-                status = res.get('status')
-                msg = res.get('message') or res.get('msg') or ''
-                
-                # 判断成功条件 (与 sheerid_verifier.py 保持一致)
-                if status == 'success' or res.get('success') == True or "successfully" in msg.lower():
-                    success = True
-                    msg = f"验证成功: {msg}" if msg else "验证成功"
-                else:
-                    success = False
-                    msg = f"验证失败: {msg or '未知错误'}"
-            
+            success, msg = await self._verify_link(link, email, browser_id)
             if not success:
                 return False, f"SheerID验证失败: {msg}"
             
-            self.log_signal.emit(f"  ✅ SheerID验证成功: {msg}")
-            if browser_id: self.progress_signal.emit(browser_id, "✅ 验证成功", "SheerID验证通过，准备刷新...")
-            
-            # 更新状态为已验证
-            AccountManager.move_to_verified(line)
-            
             # 刷新页面
             await page.reload(wait_until='domcontentloaded')
-            await asyncio.sleep(5)
+            await self._wait_settled(page, 5000)
             
             # Step 3c: 绑卡订阅
             return await self._handle_verified(page, card_info, None, browser_id)
@@ -406,6 +469,102 @@ class AutoAllInOneWorker(QThread):
         except Exception as e:
             return False, f"处理link_ready状态出错: {e}"
     
+    async def _verify_link(self, link, email, browser_id=None):
+        """
+        提交 SheerID 链接验证，成功后把账号标记为已验证
+        返回: (success, message)
+        """
+        self.log_signal.emit(f"  ✔️ 步骤3b: SheerID验证...")
+        
+        # 提取 VID 用于 verify_batch
+        vid = link
+        if "http" in vid:
+             match = _VID_RE.search(link)
+             if match: vid = match.group(1)
+        
+        # 交给共享的验证调度协程，与其他账号的 VID 合并成批提交
+        res = await self._verify_vid(vid, browser_id)
+
+        # 处理最终结果
+        success = False
+        msg = "验证未完成"
+        
+        if res:
+            status = res.get('status')
+            msg = res.get('message') or res.get('msg') or ''
+            
+            # 判断成功条件 (与 sheerid_verifier.py 保持一致)
+            if status == 'success' or res.get('success') == True or "successfully" in msg.lower():
+                success = True
+                msg = f"验证成功: {msg}" if msg else "验证成功"
+            else:
+                success = False
+                msg = f"验证失败: {msg or '未知错误'}"
+        
+        if not success:
+            return False, msg
+        
+        self.log_signal.emit(f"  ✅ SheerID验证成功: {msg}")
+        if browser_id: self.progress_signal.emit(browser_id, "✅ 验证成功", "SheerID验证通过，准备绑卡...")
+        
+        # 更新状态为已验证
+        await asyncio.to_thread(AccountManager.move_to_verified, f"{link}----{email}")
+        return True, msg
+    
+    async def _verify_vid(self, vid, browser_id=None):
+        """提交一个 VID 到共享验证队列，等待其结果（结果字典，失败时为 None）"""
+        fut = self._pending_vids.get(vid)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_future()
+            self._pending_vids[vid] = fut
+            self._vid_browser[vid] = browser_id
+            self._vid_queue.put_nowait(vid)
+        return await asyncio.shield(fut)
+    
+    async def _sheerid_dispatch_loop(self):
+        """
+        共享的 SheerID 验证调度协程：
+        把各 worker 在短时间窗口内提交的 VID 合并成一批（最多 SHEERID_BATCH_SIZE 个），
+        每批只占用一个后台线程、一次 CSRF 刷新和一次批量提交
+        """
+        loop = asyncio.get_running_loop()
+        batch_tasks = set()
+        while True:
+            batch = [await self._vid_queue.get()]
+            deadline = loop.time() + SHEERID_BATCH_WINDOW
+            while len(batch) < SHEERID_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._vid_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._verify_vid_batch(batch))
+            batch_tasks.add(task)
+            task.add_done_callback(batch_tasks.discard)
+    
+    async def _verify_vid_batch(self, vids):
+        """在后台线程中执行一次 verify_batch，并把结果分发给各自等待的 worker"""
+        verifier = SheerIDVerifier(api_key=self.api_key)
+        
+        # 实时回调：callback 在后台线程调用，emit 是线程安全的
+        def verification_callback(callback_vid, msg):
+            browser_id = self._vid_browser.get(callback_vid)
+            if browser_id:
+                self.progress_signal.emit(browser_id, "⏳ 验证中", f"{msg}")
+        
+        try:
+            results = await asyncio.to_thread(verifier.verify_batch, vids, callback=verification_callback)
+        except Exception as e:
+            results = {vid: {"status": "error", "message": str(e)} for vid in vids}
+        
+        for vid in vids:
+            self._vid_browser.pop(vid, None)
+            fut = self._pending_vids.pop(vid, None)
+            if fut and not fut.done():
+                fut.set_result(results.get(vid))
+    
     async def _handle_verified(self, page, card_info, account_info, browser_id=None):
         """处理已验证未绑卡的账号"""
         try:
@@ -416,8 +575,6 @@ class AutoAllInOneWorker(QThread):
                 return False, "没有可用的卡片"
             
             # 使用现有的绑卡函数
-            from auto_bind_card import auto_bind_card
-            
             success, message = await auto_bind_card(
                 page, 
                 card_info=card_info, 
@@ -441,9 +598,16 @@ class AutoAllInOneWorker(QThread):
 class AutoAllInOneWindow(QWidget):
     """一键全自动处理窗口"""
     
+    accounts_loaded = pyqtSignal(object)  # 后台加载完成的账号列表，或加载失败的异常
+    
     def __init__(self):
         super().__init__()
         self.worker = None
+        self.accounts = []
+        self._browser_id_to_row = {}
+        # 提前启动常驻事件循环线程，点击开始时无需再创建事件循环
+        get_loop_thread()
+        self.accounts_loaded.connect(self._on_accounts_loaded)
         self.initUI()
         self.load_accounts()
         self.load_cards()
@@ -544,11 +708,24 @@ class AutoAllInOneWindow(QWidget):
         log_label = QLabel("运行日志:")
         layout.addWidget(log_label)
         
-        self.log_text = QTextEdit()
+        # 纯文本日志框，只保留最近 LOG_MAX_LINES 行，长时间运行内存不再无限增长
+        self.log_text = QPlainTextEdit()
+        self.log_text.setMaximumBlockCount(LOG_MAX_LINES)
         self.log_text.setReadOnly(True)
         self.log_text.setMaximumHeight(150)
         layout.addWidget(self.log_text)
         
+        # 日志先进缓冲区，由定时器每 100ms 合并写入一次，避免工作线程高频日志刷爆 UI 线程
+        self._log_buffer = []
+        # 模块 logger 的异常堆栈经队列转入同一缓冲区，不再由各协程直接打印到 stderr
+        self._log_records = queue.SimpleQueue()
+        self._log_handler = logging.handlers.QueueHandler(self._log_records)
+        logger.addHandler(self._log_handler)
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(100)
+        self._log_timer.timeout.connect(self._flush_log)
+        self._log_timer.start()
+        
         # 按钮区域
         button_layout = QHBoxLayout()
         
@@ -598,92 +775,108 @@ class AutoAllInOneWindow(QWidget):
         except Exception as e:
             self.card_count_label.setText(f"卡片: 0")
             self.log(f"❌ 加载卡片失败: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("加载卡片失败")
     
     def load_accounts(self):
-        """加载所有待处理账号"""
+        """加载所有待处理账号（查库和获取浏览器列表在事件循环线程中并发执行，不阻塞界面）"""
+        future = get_loop_thread().submit(self._fetch_accounts())
+        future.add_done_callback(lambda f: self.accounts_loaded.emit(f.exception() or f.result()))
+    
+    @staticmethod
+    def _query_pending_accounts():
+        """查询所有非已订阅和无资格的账号（包括待检测资格的）"""
+        DBManager.init_db()
+        conn = DBManager.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT email, password, recovery_email, secret_key, verification_link, status 
+            FROM accounts 
+            WHERE status NOT IN ('subscribed', 'ineligible')
+            ORDER BY 
+                CASE status
+                    WHEN 'link_ready' THEN 1
+                    WHEN 'verified' THEN 2
+                    WHEN 'pending_check' THEN 3
+                    ELSE 4
+                END,
+                email
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
+    async def _fetch_accounts(self):
+        """并发查库和获取浏览器列表，返回已关联浏览器的账号列表"""
+        rows, browsers = await asyncio.gather(
+            asyncio.to_thread(self._query_pending_accounts),
+            asyncio.to_thread(get_browser_list, page=0, pageSize=1000)
+        )
+        
+        # 备注格式 email----...，只需要第一段，split 最多切一次
+        email_to_browser = {
+            parts[0].strip(): browser.get('id', '')
+            for browser in browsers
+            if '----' in (remark := browser.get('remark', ''))
+            and '@' in (parts := remark.split('----', 1))[0]
+        }
+        
+        return [
+            {
+                'email': row[0],
+                'password': row[1] or '',
+                'backup': row[2] or '',
+                'secret': row[3] or '',
+                'link': row[4] or '',
+                'status': row[5] or '',
+                'browser_id': browser_id
+            }
+            for row in rows
+            if (browser_id := email_to_browser.get(row[0], ''))
+        ]
+    
+    def _on_accounts_loaded(self, result):
+        """后台加载完成后在界面线程中填充表格（result 为账号列表或加载时抛出的异常）"""
+        if isinstance(result, BaseException):
+            self.log(f"❌ 加载账号失败: {result}")
+            return
+        
         try:
-            DBManager.init_db()
-            conn = DBManager.get_connection()
-            cursor = conn.cursor()
-            
-            # 查询所有非已订阅和无资格的账号（包括待检测资格的）
-            cursor.execute("""
-                SELECT email, password, recovery_email, secret_key, verification_link 
-                FROM accounts 
-                WHERE status NOT IN ('subscribed', 'ineligible')
-                ORDER BY 
-                    CASE status
-                        WHEN 'link_ready' THEN 1
-                        WHEN 'verified' THEN 2
-                        WHEN 'pending_check' THEN 3
-                        ELSE 4
-                    END,
-                    email
-            """)
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 获取浏览器列表
-            browsers = get_browser_list(page=0, pageSize=1000)
-            email_to_browser = {}
-            for browser in browsers:
-                remark = browser.get('remark', '')
-                if '----' in remark:
-                    parts = remark.split('----')
-                    if parts and '@' in parts[0]:
-                        browser_email = parts[0].strip()
-                        browser_id = browser.get('id', '')
-                        email_to_browser[browser_email] = browser_id
+            self.accounts = result
             
-            self.table.setRowCount(0)
-            self.accounts = []
-            
-            for row in rows:
-                email = row[0]
-                browser_id = email_to_browser.get(email, '')
-                
-                if not browser_id:
-                    continue
-                
-                account = {
-                    'email': email,
-                    'password': row[1] or '',
-                    'backup': row[2] or '',
-                    'secret': row[3] or '',
-                    'link': row[4] or '',
-                    'browser_id': browser_id
-                }
-                self.accounts.append(account)
-                
-                # 添加到表格
-                row_idx = self.table.rowCount()
-                self.table.insertRow(row_idx)
-                
-                # 复选框
-                checkbox = QCheckBox()
-                checkbox.setChecked(True)
-                checkbox_widget = QWidget()
-                checkbox_layout = QHBoxLayout(checkbox_widget)
-                checkbox_layout.addWidget(checkbox)
-                checkbox_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                checkbox_layout.setContentsMargins(0, 0, 0, 0)
-                self.table.setCellWidget(row_idx, 0, checkbox_widget)
+            # 一次性分配好行数再按下标填充，填充期间暂停重绘/排序/信号，避免每行触发一次刷新
+            sorting_enabled = self.table.isSortingEnabled()
+            self.table.setUpdatesEnabled(False)
+            self.table.setSortingEnabled(False)
+            self.table.blockSignals(True)
+            try:
+                self.table.setRowCount(0)
+                self.table.setRowCount(len(self.accounts))
+                self._browser_id_to_row = {}
                 
-                self.table.setItem(row_idx, 1, QTableWidgetItem(account['email']))
-                self.table.setItem(row_idx, 2, QTableWidgetItem(account['browser_id']))
-                self.table.setItem(row_idx, 3, QTableWidgetItem("待处理"))
-                self.table.setItem(row_idx, 4, QTableWidgetItem(""))
+                for row_idx, account in enumerate(self.accounts):
+                    self._browser_id_to_row[account['browser_id']] = row_idx
+                    
+                    # 复选框（原生可勾选单元格，不再为每行创建 QWidget + 布局 + QCheckBox）
+                    check_item = QTableWidgetItem()
+                    check_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+                    check_item.setCheckState(Qt.CheckState.Checked)
+                    self.table.setItem(row_idx, 0, check_item)
+                    
+                    self.table.setItem(row_idx, 1, QTableWidgetItem(account['email']))
+                    self.table.setItem(row_idx, 2, QTableWidgetItem(account['browser_id']))
+                    self.table.setItem(row_idx, 3, QTableWidgetItem("待处理"))
+                    self.table.setItem(row_idx, 4, QTableWidgetItem(""))
+            finally:
+                self.table.blockSignals(False)
+                self.table.setSortingEnabled(sorting_enabled)
+                self.table.setUpdatesEnabled(True)
             
             self.account_count_label.setText(f"账号: {len(self.accounts)}")
             self.log(f"✅ 加载了 {len(self.accounts)} 个待处理账号")
             
         except Exception as e:
-            self.log(f"❌ 加载账号失败: {e}")
-            import traceback
-            traceback.print_exc()
+            self.log(f"❌ 显示账号失败: {e}")
+            logger.exception("显示账号失败")
     
     def refresh_all(self):
         """刷新"""
@@ -692,24 +885,19 @@ class AutoAllInOneWindow(QWidget):
     
     def toggle_select_all(self, state):
         """全选/取消全选"""
-        is_checked = (state == Qt.CheckState.Checked.value)
+        check_state = Qt.CheckState.Checked if state == Qt.CheckState.Checked.value else Qt.CheckState.Unchecked
         for row in range(self.table.rowCount()):
-            checkbox_widget = self.table.cellWidget(row, 0)
-            if checkbox_widget:
-                checkbox = checkbox_widget.findChild(QCheckBox)
-                if checkbox:
-                    checkbox.setChecked(is_checked)
+            item = self.table.item(row, 0)
+            if item:
+                item.setCheckState(check_state)
     
     def get_selected_accounts(self):
         """获取选中的账号"""
         selected = []
-        for row in range(self.table.rowCount()):
-            checkbox_widget = self.table.cellWidget(row, 0)
-            if checkbox_widget:
-                checkbox = checkbox_widget.findChild(QCheckBox)
-                if checkbox and checkbox.isChecked():
-                    if row < len(self.accounts):
-                        selected.append(self.accounts[row])
+        for row in range(min(self.table.rowCount(), len(self.accounts))):
+            item = self.table.item(row, 0)
+            if item and item.checkState() == Qt.CheckState.Checked:
+                selected.append(self.accounts[row])
         return selected
     
     def start_processing(self):
@@ -773,22 +961,39 @@ class AutoAllInOneWindow(QWidget):
         self.btn_stop.setEnabled(False)
         self.btn_refresh.setEnabled(True)
         self.log("\n✅ 全自动处理任务完成！")
+        self._flush_log()
         QMessageBox.information(self, "完成", "全自动处理任务已完成")
     
     def update_account_status(self, browser_id, status, message):
         """更新表格状态"""
-        for row in range(self.table.rowCount()):
-            if self.table.item(row, 2) and self.table.item(row, 2).text() == browser_id:
-                self.table.setItem(row, 3, QTableWidgetItem(status))
-                self.table.setItem(row, 4, QTableWidgetItem(message))
-                break
+        row = self._browser_id_to_row.get(browser_id)
+        if row is None:
+            return
+        self.table.setItem(row, 3, QTableWidgetItem(status))
+        self.table.setItem(row, 4, QTableWidgetItem(message))
     
     def log(self, message):
-        """添加日志"""
-        self.log_text.append(message)
+        """添加日志（写入缓冲区，由 _flush_log 批量输出）"""
+        self._log_buffer.append(message)
+    
+    def _flush_log(self):
+        """将缓冲区中的日志（含 logger 记录）一次性追加到日志框"""
+        while not self._log_records.empty():
+            self._log_buffer.append(self._log_records.get_nowait().getMessage())
+        if not self._log_buffer:
+            return
+        text = '\n'.join(self._log_buffer)
+        self._log_buffer.clear()
+        self.log_text.appendPlainText(text)
         scrollbar = self.log_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
 
+    def closeEvent(self, event):
+        """关闭窗口时摘掉模块 logger 上的处理器，避免多次打开窗口后处理器累积"""
+        logger.removeHandler(self._log_handler)
+        self._log_timer.stop()
+        super().closeEvent(event)
+
 
 def main():
     app = QApplication(sys.argv)
@@ -2,12 +2,54 @@
 自动绑卡脚本 - Google One AI Student 订阅
 """
 import asyncio
-import pyotp
-from playwright.async_api import async_playwright, Page
+import base64
+import os
+import re
+from functools import lru_cache
+from playwright.async_api import async_playwright, expect, Page, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
 from bit_api import openBrowser, closeBrowser
 from bit_playwright import google_login
 from account_manager import AccountManager
 
+# 付款表单所在的 iframe，以及点击 Add card 后其内部嵌入的卡片表单 iframe（三种写法任一）
+PAYMENT_IFRAME = 'iframe[src*="tokenized.play.google.com"]'
+CARD_FORM_IFRAME = 'iframe[name="hnyNZeIframe"], iframe[src*="instrumentmanager"], iframe[id*="hnyNZe"]'
+
+# 绑卡流程用不到的资源：图片/字体和统计、广告请求直接拦掉，页面和 iframe 更快就绪
+# 付款（tokenized/pay）和登录（accounts）域名下的资源不拦截，避免影响表单和验证码
+_BLOCKED_ASSETS = re.compile(
+    r'^https?://(?!(?:tokenized\.play|accounts|pay|payments)\.google\.com[/:])'
+    r'[^?#]*\.(?:png|jpe?g|gif|webp|svg|ico|woff2?|ttf|otf)(?:[?#]|$)'
+)
+_BLOCKED_TRACKERS = re.compile(
+    r'^https?://(?:[\w-]+\.)*(?:google-analytics\.com|googletagmanager\.com|doubleclick\.net)[/:]'
+)
+
+async def block_heavy_resources(page: Page):
+    """在页面上拦截图片/字体和统计请求（按 URL 正则匹配，未命中的请求不经过 Python）"""
+    await page.route(_BLOCKED_ASSETS, lambda route: route.abort())
+    await page.route(_BLOCKED_TRACKERS, lambda route: route.abort())
+
+# 在卡片表单内一次写入卡号/有效期/CVV：用原生 value setter 赋值并派发 input/change 事件，
+# 让页面框架感知到变化（直接赋 .value 会被受控输入框忽略）；返回各输入框回读到的值
+_FILL_CARD_JS = """
+(inputs, values) => {
+    const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    values.forEach((value, i) => {
+        const input = inputs[i];
+        input.focus();
+        setValue.call(input, value);
+        input.dispatchEvent(new Event('input', {bubbles: true}));
+        input.dispatchEvent(new Event('change', {bubbles: true}));
+        input.blur();
+    });
+    return values.map((_, i) => inputs[i].value);
+}
+"""
+
+# 回读比对时只看数字，输入框自动插入的空格、斜杠不算不一致
+_NON_DIGITS = re.compile(r'\D')
+
 # 测试卡信息
 TEST_CARD = {
     'number': '5481087170529907',
@@ -16,6 +58,256 @@ TEST_CARD = {
     'cvv': '536'
 }
 
+# 页面/iframe 中各步骤的候选选择器（按优先级排列），模块加载时构建一次
+GET_OFFER_SELECTORS = (
+    'button:has-text("Get student offer")',
+    'button:has-text("Get offer")',
+    'a:has-text("Get student offer")',
+    'button:has-text("Get")',
+    '[role="button"]:has-text("Get")',
+)
+
+ADD_CARD_SELECTORS = (
+    'span.PjwEQ:has-text("Add card")',
+    'span.PjwEQ',
+    ':text("Add card")',
+    'div:has-text("Add card")',
+    'span:has-text("Add card")',
+)
+
+SAVE_CARD_SELECTORS = (
+    'button:has-text("Save card")',
+    'button:has-text("保存卡")',  # 中文
+    'button:has-text("Save")',
+    'button:has-text("保存")',  # 中文
+    'button[type="submit"]',
+)
+
+# 订阅按钮（精确选择器优先），已绑卡检测和绑卡后订阅共用
+SUBSCRIBE_SELECTORS = (
+    'span.UywwFc-vQzf8d:has-text("Subscribe")',
+    'span[jsname="V67aGc"]',
+    'span.UywwFc-vQzf8d',
+    'span:has-text("Subscribe")',
+    ':text("Subscribe")',
+    'button:has-text("Subscribe")',
+)
+
+# 绑卡后查找订阅按钮时额外尝试的宽泛选择器（已绑卡检测不用，避免误判）
+SUBSCRIBE_FALLBACK_SELECTORS = SUBSCRIBE_SELECTORS + (
+    'button:has-text("订阅")',
+    'button:has-text("Start")',
+    'button:has-text("开始")',
+    'button:has-text("继续")',
+    'div[role="button"]:has-text("Subscribe")',
+    '[role="button"]:has-text("Subscribe")',
+    'button[type="submit"]',
+    # 根据截图，可能在 dialog 中
+    'dialog span:has-text("Subscribe")',
+    '[role="dialog"] span:has-text("Subscribe")',
+    'dialog button:has-text("Subscribe")',
+    '[role="dialog"] button:has-text("Subscribe")',
+)
+
+# 卡过期换绑：关闭错误提示、重新打开优惠、选中已有卡片
+GOT_IT_SELECTORS = (
+    'button:has-text("Got it")',
+    ':text("Got it")',
+    'button:has-text("确定")',
+)
+
+REOPEN_OFFER_SELECTORS = (
+    'button:has-text("Get student offer")',
+    ':text("Get student offer")',
+)
+
+SAVED_CARD_SELECTORS = (
+    'span.Ngbcnc',  # Mastercard-7903 的 span
+    'div.dROd9.ct1Mcc',  # 卡片容器
+    ':has-text("Mastercard")',
+)
+
+# 等待用的合并选择器：任一出现即继续（订阅结果只取可见元素，隐藏的同名文本不算）
+SUBSCRIBED_CSS = ':text("Subscribed") >> visible=true'
+SUBSCRIBE_RESULT_CSS = ':text("Subscribed"), :text("Error"), :text("Your card issuer declined") >> visible=true'
+REOPEN_OFFER_CSS = ', '.join(REOPEN_OFFER_SELECTORS)
+SAVED_CARD_CSS = ', '.join(SAVED_CARD_SELECTORS[:2])
+
+async def _wait_for(locator, timeout, state='visible'):
+    """
+    等待元素达到指定状态（替代固定 sleep），最多等待 timeout 毫秒
+    超时不抛异常，返回是否已达到，由调用方继续原有流程；其他错误（如 frame 已分离）照常抛出
+    """
+    try:
+        await locator.wait_for(state=state, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+@lru_cache(maxsize=None)
+def _selector_union(selectors):
+    """把候选选择器元组用逗号合并成一个选择器，每个元组只拼接一次"""
+    return ', '.join(selectors)
+
+async def _first_match(container, selectors):
+    """
+    按列表顺序返回第一个可见的候选选择器
+    先用逗号合并的选择器一次往返判断是否有任一候选可见，都不可见时直接返回；
+    否则再并发探测各选择器，保留列表中的优先级
+    探测用 is_visible()：只返回布尔值，不像 count() 那样统计全部匹配
+    
+    Returns:
+        (selector, locator)，locator 指向该选择器第一个可见元素；都不可见时返回 (None, None)
+    """
+    def visible(selector):
+        return container.locator(f'{selector} >> visible=true').first
+    
+    if not await visible(_selector_union(selectors)).is_visible():
+        return None, None
+    
+    locators = [visible(selector) for selector in selectors]
+    found = await asyncio.gather(*(loc.is_visible() for loc in locators))
+    for selector, locator, is_found in zip(selectors, locators, found):
+        if is_found:
+            return selector, locator
+    return None, None
+
+# 调试截图开关：设置环境变量 BIND_DEBUG_SHOTS=1 时才截图，默认不截图
+DEBUG_SHOTS = os.getenv('BIND_DEBUG_SHOTS') == '1'
+# 设置 BIND_DEBUG 环境变量后才打印异常堆栈
+DEBUG_TRACEBACK = bool(os.getenv('BIND_DEBUG'))
+
+# 后台任务（调试截图、写库），保持引用直到完成（否则任务可能被回收）
+_background_tasks = set()
+
+def _spawn(coro):
+    """以后台任务运行协程，不阻塞当前流程"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+async def _screenshot(page, cdp, path):
+    """
+    JPEG 截图：优先通过 CDP Page.captureScreenshot(optimizeForSpeed) 截取，写盘放到线程池
+    """
+    try:
+        if cdp is not None:
+            result = await cdp.send('Page.captureScreenshot', {
+                'format': 'jpeg', 'quality': 80, 'optimizeForSpeed': True
+            })
+            data = base64.b64decode(result['data'])
+        else:
+            data = await page.screenshot(type='jpeg', quality=80)
+        await asyncio.to_thread(_write_file, path, data)
+        print(f"截图已保存: {path}")
+    except Exception as e:
+        print(f"截图失败 {path}: {e}")
+
+def _maybe_screenshot(page, cdp, path):
+    """调试模式下在后台截图，不阻塞绑卡流程；未开启 DEBUG_SHOTS 时直接跳过"""
+    if not DEBUG_SHOTS:
+        return
+    _spawn(_screenshot(page, cdp, path))
+
+async def _move_to_subscribed(line):
+    try:
+        await asyncio.to_thread(AccountManager.move_to_subscribed, line)
+    except Exception as e:
+        print(f"更新订阅状态失败: {e}")
+
+# 账号行（email----password----backup----secret）的字段顺序
+ACCOUNT_FIELDS = ('email', 'password', 'backup', 'secret')
+
+def _account_line(info):
+    """把账号信息拼回 email----password----backup----secret 格式"""
+    return '----'.join(info.get(field) or '' for field in ACCOUNT_FIELDS)
+
+def _mark_subscribed(account_info):
+    """在后台把账号标记为已订阅（写库放到线程池），订阅成功后可立即返回"""
+    if not account_info or not account_info.get('email'):
+        return
+    _spawn(_move_to_subscribed(_account_line(account_info)))
+
+async def _click_subscribe_and_verify(outer, page: Page, cdp, subscribe_button, shot_name: str):
+    """
+    点击订阅按钮并判断订阅结果
+    
+    Returns:
+        (state, message): state 为 'subscribed'（已确认订阅）、'error'（出现错误，卡可能过期/被拒）
+        或 'unknown'（两者都未检测到）
+    """
+    await subscribe_button.click()
+    print("✅ 已点击订阅按钮")
+    
+    # 等待订阅结果（Subscribed 或错误提示）出现，最多10秒；web-first 断言在驱动端轮询
+    try:
+        await expect(outer.locator(SUBSCRIBE_RESULT_CSS).first).to_be_visible(timeout=10000)
+    except AssertionError:
+        _maybe_screenshot(page, cdp, shot_name)
+        return 'unknown', "未检测到 'Subscribed' 或 'Error'"
+    _maybe_screenshot(page, cdp, shot_name)
+    
+    try:
+        if await outer.locator(SUBSCRIBED_CSS).first.is_visible():
+            print("  ✅ 检测到 'Subscribed'，订阅确认成功！")
+            return 'subscribed', "Subscribed"
+    except PlaywrightError as e:
+        print(f"验证订阅状态时出错: {e}")
+        return 'unknown', str(e)
+    
+    print("  ⚠️ 检测到错误信息（卡可能过期或被拒）")
+    return 'error', "卡被拒绝或已过期"
+
+async def _reopen_card_selection(outer, page: Page):
+    """卡过期换绑：关闭错误提示，重新打开付款弹窗并点击已有卡片，之后由调用方继续绑卡流程"""
+    print("\n【卡过期换绑流程】")
+    
+    # 1. 点击 "Got it" 按钮
+    print("1. 点击 'Got it' 按钮...")
+    _, element = await _first_match(outer, GOT_IT_SELECTORS)
+    if element:
+        try:
+            await element.click()
+            print("  ✅ 已点击 'Got it'")
+            await _wait_for(page.locator(REOPEN_OFFER_CSS).first, 3000)
+        except PlaywrightTimeoutError:
+            pass
+    
+    # 2. 点击主页面的 "Get student offer"
+    print("2. 重新点击主页面的 'Get student offer'...")
+    _, element = await _first_match(page, REOPEN_OFFER_SELECTORS)
+    if element:
+        try:
+            await element.click()
+            print("  ✅ 已点击 'Get student offer'")
+            await _wait_for(
+                outer.locator(SAVED_CARD_CSS).first,
+                8000
+            )
+        except PlaywrightTimeoutError:
+            pass
+    
+    # 3. 在 iframe 中找到并点击已有卡片
+    print("3. 在 iframe 中查找并点击过期卡片...")
+    try:
+        # 点击卡片（Mastercard-7903 或类似）
+        selector, element = await _first_match(outer, SAVED_CARD_SELECTORS)
+        if element:
+            try:
+                await element.click()
+                print(f"  ✅ 已点击过期卡片 (selector: {selector})")
+            except PlaywrightTimeoutError:
+                pass
+        
+        print("4. 进入换绑流程，继续后续绑卡操作...")
+    except Exception as e:
+        print(f"  点击过期卡片时出错: {e}，尝试继续...")
+
 async def check_and_login(page: Page, account_info: dict = None):
     """
     检测是否已登录，如果未登录则执行登录流程
@@ -40,7 +332,7 @@ async def check_and_login(page: Page, account_info: dict = None):
                 email_input = await page.wait_for_selector('input[type="email"]', timeout=3000)
                 if email_input:
                     return False, "需要登录但未提供账号信息"
-            except:
+            except PlaywrightTimeoutError:
                 pass
             return True, "已登录或无需登录"
             
@@ -62,52 +354,63 @@ async def auto_bind_card(page: Page, card_info: dict = None, account_info: dict
     """
     if card_info is None:
         card_info = TEST_CARD
+    number, exp_month, exp_year, cvv = (card_info[k] for k in ('number', 'exp_month', 'exp_year', 'cvv'))
+    exp_value = f"{exp_month}{exp_year}"
     
     try:
         # 首先检测并执行登录（如果需要）
-        login_success, login_msg = await check_and_login(page, account_info)
+        # 同时等待 "Get student offer" 按钮或付款 iframe 出现（只读等待，与登录检测互不影响）
+        (login_success, login_msg), _ = await asyncio.gather(
+            check_and_login(page, account_info),
+            _wait_for(
+                page.locator(f'button:has-text("Get student offer"), button:has-text("Get offer"), {PAYMENT_IFRAME}').first,
+                5000
+            )
+        )
         if not login_success and "需要登录" in login_msg:
             return False, f"登录失败: {login_msg}"
         
         print("\n开始自动绑卡流程...")
         
+        # 付款 iframe 定位器只建一次，整个流程复用（FrameLocator 是惰性规则，每次操作时才重新解析）
+        outer = page.frame_locator(PAYMENT_IFRAME)
+        
+        # 调试截图时整个流程复用一个 CDP 会话（非 Chromium 时退回 page.screenshot）
+        cdp = None
+        if DEBUG_SHOTS:
+            try:
+                cdp = await page.context.new_cdp_session(page)
+            except Exception:
+                pass
+        
         # 截图1：初始页面
-        await page.screenshot(path="step1_initial.png")
-        print("截图已保存: step1_initial.png")
+        _maybe_screenshot(page, cdp, "step1_initial.jpg")
         
         # Step 1: 等待并点击 "Get student offer" 按钮
         print("等待 'Get student offer' 按钮...")
         try:
             # 尝试多种可能的选择器
-            selectors = [
-                'button:has-text("Get student offer")',
-                'button:has-text("Get offer")',
-                'a:has-text("Get student offer")',
-                'button:has-text("Get")',
-                '[role="button"]:has-text("Get")'
-            ]
-            
             clicked = False
-            for selector in selectors:
+            selector, element = await _first_match(page, GET_OFFER_SELECTORS)
+            if element:
                 try:
-                    element = page.locator(selector).first
-                    if await element.count() > 0:
-                        await element.wait_for(state='visible', timeout=3000)
-                        await element.click()
-                        print(f"✅ 已点击 'Get student offer' (selector: {selector})")
-                        clicked = True
-                        break
-                except:
-                    continue
+                    await element.wait_for(state='visible', timeout=3000)
+                    await element.click()
+                    print(f"✅ 已点击 'Get student offer' (selector: {selector})")
+                    clicked = True
+                except PlaywrightTimeoutError:
+                    pass
             
             if not clicked:
                 print("⚠️ 未找到 'Get student offer' 按钮，可能已在付款页面")
             
-            # 等待付款页面和 iframe 加载
+            # 等待付款页面和 iframe 加载：iframe 中出现订阅按钮/Add card/输入框任一即可继续
             print("等待付款页面和 iframe 加载...")
-            await asyncio.sleep(8)  # 增加延迟到5秒
-            await page.screenshot(path="step2_after_get_offer.png")
-            print("截图已保存: step2_after_get_offer.png")
+            await _wait_for(
+                outer.locator('span.UywwFc-vQzf8d, span.PjwEQ, input').first,
+                11000
+            )
+            _maybe_screenshot(page, cdp, "step2_after_get_offer.jpg")
             
         except Exception as e:
             print(f"处理 'Get student offer' 时出错: {e}")
@@ -115,184 +418,32 @@ async def auto_bind_card(page: Page, card_info: dict = None, account_info: dict
         # 前置判断：检查是否已经绑卡（是否已显示订阅按钮）
         print("\n检查账号是否已绑卡...")
         try:
-            # 等待一下让页面稳定
-            await asyncio.sleep(3)
-            
-            # 先尝试获取 iframe
-            try:
-                iframe_locator = page.frame_locator('iframe[src*="tokenized.play.google.com"]')
-                print("✅ 找到 iframe，在 iframe 中检查订阅按钮")
-                
-                # 使用精确的选择器
-                subscribe_selectors = [
-                    'span.UywwFc-vQzf8d:has-text("Subscribe")',
-                    'span[jsname="V67aGc"]',
-                    'span.UywwFc-vQzf8d',
-                    'span:has-text("Subscribe")',
-                    ':text("Subscribe")',
-                    'button:has-text("Subscribe")',
-                ]
+            # 在付款 iframe 中查找订阅按钮
+            selector, subscribe_button_early = await _first_match(outer, SUBSCRIBE_SELECTORS)
+            
+            # 如果找到订阅按钮，说明已经绑过卡了，直接点击订阅
+            if subscribe_button_early:
+                print(f"  ✅ 检测到订阅按钮，账号已绑卡！(iframe, selector: {selector})")
+                print("账号已绑卡，跳过绑卡流程，直接订阅...")
+                state, _ = await _click_subscribe_and_verify(
+                    outer, page, cdp, subscribe_button_early, "step_subscribe_existing_card.jpg"
+                )
                 
-                # 在 iframe 中查找订阅按钮
-                already_bound = False
-                subscribe_button_early = None
+                if state == 'subscribed':
+                    print("✅ 使用已有卡订阅成功并已确认！")
+                    # 更新数据库状态为已订阅
+                    _mark_subscribed(account_info)
+                    return True, "使用已有卡订阅成功 (Already bound, Subs cribed)"
                 
-                for selector in subscribe_selectors:
-                    try:
-                        element = iframe_locator.locator(selector).first
-                        count = await element.count()
-                        if count > 0:
-                            print(f"  ✅ 检测到订阅按钮，账号已绑卡！(iframe, selector: {selector})")
-                            subscribe_button_early = element
-                            already_bound = True
-                            break
-                    except:
-                        continue
+                if state == 'unknown':
+                    print("⚠️ 未检测到 'Subscribed' 或 'Error'，但可能仍然成功")
+                    return True, "使用已有卡订阅成功 (Already bound)"
                 
-                # 如果找到订阅按钮，说明已经绑过卡了，直接点击订阅
-                if already_bound and subscribe_button_early:
-                    print("账号已绑卡，跳过绑卡流程，直接订阅...")
-                    await asyncio.sleep(2)
-                    await subscribe_button_early.click()
-                    print("✅ 已点击订阅按钮")
-                    
-                    # 等待10秒并验证订阅成功
-                    await asyncio.sleep(10)
-                    await page.screenshot(path="step_subscribe_existing_card.png")
-                    print("截图已保存: step_subscribe_existing_card.png")
-                    
-                    # 在 iframe 中检查是否显示 "Subscribed"
-                    try:
-                        subscribed_selectors = [
-                            ':text("Subscribed")',
-                            'text=Subscribed',
-                            '*:has-text("Subscribed")',
-                        ]
-                        
-                        subscribed_found = False
-                        for selector in subscribed_selectors:
-                            try:
-                                element = iframe_locator.locator(selector).first
-                                count = await element.count()
-                                if count > 0:
-                                    print(f"  ✅ 检测到 'Subscribed'，订阅确认成功！")
-                                    subscribed_found = True
-                                    break
-                            except:
-                                continue
-                        
-                        if subscribed_found:
-                            print("✅ 使用已有卡订阅成功并已确认！")
-                            # 更新数据库状态为已订阅
-                            if account_info and account_info.get('email'):
-                                line = f"{account_info.get('email', '')}----{account_info.get('password', '')}----{account_info.get('backup', '')}----{account_info.get('secret', '')}"
-                                AccountManager.move_to_subscribed(line)
-                            return True, "使用已有卡订阅成功 (Already bound, Subs cribed)"
-                        
-                        # 如果没找到 Subscribed，检查是否出现 Error（卡过期）
-                        print("未检测到 'Subscribed'，检查是否出现错误...")
-                        error_selectors = [
-                            ':text("Error")',
-                            'text=Error',
-                            ':has-text("Your card issuer declined")',
-                        ]
-                        
-                        error_found = False
-                        for selector in error_selectors:
-                            try:
-                                element = iframe_locator.locator(selector).first
-                                count = await element.count()
-                                if count > 0:
-                                    print(f"  ⚠️ 检测到错误信息（卡可能过期），准备换绑...")
-                                    error_found = True
-                                    break
-                            except:
-                                continue
-                        
-                        if error_found:
-                            # 卡过期换绑流程
-                            print("\n【卡过期换绑流程】")
-                            
-                            # 1. 点击 "Got it" 按钮
-                            print("1. 点击 'Got it' 按钮...")
-                            got_it_selectors = [
-                                'button:has-text("Got it")',
-                                ':text("Got it")',
-                                'button:has-text("确定")',
-                            ]
-                            
-                            for selector in got_it_selectors:
-                                try:
-                                    element = iframe_locator.locator(selector).first
-                                    count = await element.count()
-                                    if count > 0:
-                                        await element.click()
-                                        print("  ✅ 已点击 'Got it'")
-                                        await asyncio.sleep(3)
-                                        break
-                                except:
-                                    continue
-                            
-                            # 2. 点击主页面的 "Get student offer"
-                            print("2. 重新点击主页面的 'Get student offer'...")
-                            get_offer_selectors = [
-                                'button:has-text("Get student offer")',
-                                ':text("Get student offer")',
-                            ]
-                            
-                            for selector in get_offer_selectors:
-                                try:
-                                    element = page.locator(selector).first
-                                    count = await element.count()
-                                    if count > 0:
-                                        await element.click()
-                                        print("  ✅ 已点击 'Get student offer'")
-                                        await asyncio.sleep(8)
-                                        break
-                                except:
-                                    continue
-                            
-                            # 3. 在 iframe 中找到并点击已有卡片
-                            print("3. 在 iframe 中查找并点击过期卡片...")
-                            try:
-                                iframe_locator_card = page.frame_locator('iframe[src*="tokenized.play.google.com"]')
-                                
-                                # 点击卡片（Mastercard-7903 或类似）
-                                card_selectors = [
-                                    'span.Ngbcnc',  # Mastercard-7903 的 span
-                                    'div.dROd9.ct1Mcc',  # 卡片容器
-                                    ':has-text("Mastercard")',
-                                ]
-                                
-                                for selector in card_selectors:
-                                    try:
-                                        element = iframe_locator_card.locator(selector).first
-                                        count = await element.count()
-                                        if count > 0:
-                                            await element.click()
-                                            print(f"  ✅ 已点击过期卡片 (selector: {selector})")
-                                            await asyncio.sleep(5)
-                                            break
-                                    except:
-                                        continue
-                                
-                                print("4. 进入换绑流程，继续后续绑卡操作...")
-                                # 不 return，让代码继续执行后面的绑卡流程
-                                
-                            except Exception as e:
-                                print(f"  点击过期卡片时出错: {e}，尝试继续...")
-                        else:
-                            print("⚠️ 未检测到 'Subscribed' 或 'Error'，但可能仍然成功")
-                            return True, "使用已有卡订阅成功 (Already bound)"
-                            
-                    except Exception as e:
-                        print(f"验证订阅状态时出错: {e}")
-                        return True, "使用已有卡订阅成功 (Already bound)"
-                else:
-                    print("未检测到订阅按钮，继续绑卡流程...")
-                    
-            except Exception as e:
-                print(f"获取 iframe 失败: {e}，继续正常绑卡流程...")
+                # 出现 Error（卡过期），回到选卡界面后继续后面的绑卡流程
+                print("  ⚠️ 卡可能过期，准备换绑...")
+                await _reopen_card_selection(outer, page)
+            else:
+                print("未检测到订阅按钮，继续绑卡流程...")
                 
         except Exception as e:
             print(f"前置判断时出错: {e}，继续正常绑卡流程...")
@@ -300,14 +451,12 @@ async def auto_bind_card(page: Page, card_info: dict = None, account_info: dict
         # Step 2: 切换到 iframe（付款表单在 iframe 中）
         print("\n检测并切换到 iframe...")
         try:
-            # 等待 iframe 加载
-            await asyncio.sleep(10)
-            iframe_locator = page.frame_locator('iframe[src*="tokenized.play.google.com"]')
+            iframe_locator = outer
             print("✅ 找到 tokenized.play.google.com iframe，已切换上下文")
             
-            # 等待 iframe 内部文档加载
+            # 等待 iframe 内部文档加载：Add card 按钮或输入框出现即可点击
             print("等待 iframe 内部文档加载...")
-            await asyncio.sleep(10)  # 让内部 #document 完全加载
+            await _wait_for(iframe_locator.locator('span.PjwEQ, input').first, 30000)
             
         except Exception as e:
             print(f"❌ 未找到 iframe: {e}")
@@ -316,87 +465,41 @@ async def auto_bind_card(page: Page, card_info: dict = None, account_info: dict
         # Step 3: 在 iframe 中点击 "Add card"
         print("\n在 iframe 中等待并点击 'Add card' 按钮...")
         try:
-            await asyncio.sleep(10)  # 等待元素可点击
-            
             # 在 iframe 中查找 Add card
-            selectors = [
-                'span.PjwEQ:has-text("Add card")',
-                'span.PjwEQ',
-                ':text("Add card")',
-                'div:has-text("Add card")',
-                'span:has-text("Add card")',
-            ]
-            
             clicked = False
-            for selector in selectors:
+            selector, element = await _first_match(iframe_locator, ADD_CARD_SELECTORS)
+            if element:
                 try:
-                    element = iframe_locator.locator(selector).first
-                    count = await element.count()
-                    if count > 0:
-                        print(f"  找到 'Add card' (iframe, selector: {selector})")
-                        await element.click()
-                        print(f"✅ 已在 iframe 中点击 'Add card'")
-                        clicked = True
-                        break
-                except:
-                    continue
+                    print(f"  找到 'Add card' (iframe, selector: {selector})")
+                    await element.click()
+                    print(f"✅ 已在 iframe 中点击 'Add card'")
+                    clicked = True
+                except PlaywrightTimeoutError:
+                    pass
             
             if not clicked:
                 print("⚠️ 在 iframe 中未找到 'Add card'，尝试直接查找输入框...")
             
-            # 等待表单加载
-            print("等待卡片输入表单加载...")
-            await asyncio.sleep(10)
-            await page.screenshot(path="step3_card_form_in_iframe.png")
-            print("截图已保存: step3_card_form_in_iframe.png")
-            
             # 关键：点击 Add card 后，会在第一个 iframe 内部再出现一个 iframe！
-            # 需要再次切换到这个内部 iframe
-            print("\n检测 iframe 内部是否有第二层 iframe...")
-            try:
-                # 在第一个 iframe 中查找第二个 iframe
-                await asyncio.sleep(1)  # 等待内部 iframe 出现
-                
-                # 第二层 iframe 通常是 name="hnyNZeIframe" 或包含 instrumentmanager
-                # 尝试多种选择器
-                inner_iframe_selectors = [
-                    'iframe[name="hnyNZeIframe"]',
-                    'iframe[src*="instrumentmanager"]',
-                    'iframe[id*="hnyNZe"]',
-                ]
-                
-                inner_iframe = None
-                for selector in inner_iframe_selectors:
-                    try:
-                        temp_iframe = iframe_locator.frame_locator(selector)
-                        # 尝试访问以验证存在
-                        test_locator = temp_iframe.locator('body')
-                        if await test_locator.count() >= 0:
-                            inner_iframe = temp_iframe
-                            print(f"✅ 找到第二层 iframe（selector: {selector}）")
-                            break
-                    except:
-                        continue
-                
-                if not inner_iframe:
-                    print("⚠️ 未找到第二层 iframe，继续在当前层级操作")
-                else:
-                    # 更新 iframe_locator 为内部的 iframe
-                    iframe_locator = inner_iframe
-                    
-                    print("等待第二层 iframe 加载...")
-                    await asyncio.sleep(10)
-                
-            except Exception as e:
-                print(f"⚠️ 查找第二层 iframe 时出错: {e}")
+            # frame_locator 是惰性的，用第二层里的输入框 wait_for 驱动等待：
+            # 输入框出现即切换到第二层，超时说明没有第二层，继续在当前层级操作
+            print("等待卡片输入表单加载...")
+            inner = outer.frame_locator(CARD_FORM_IFRAME).first
+            if await _wait_for(inner.locator('input').first, 5000, state='attached'):
+                iframe_locator = inner
+                print("✅ 找到第二层 iframe")
+            else:
+                print("⚠️ 未找到第二层 iframe，继续在当前层级操作")
+            _maybe_screenshot(page, cdp, "step3_card_form_in_iframe.jpg")
             
         except Exception as e:
-            await page.screenshot(path="error_iframe_add_card.png")
+            _maybe_screenshot(page, cdp, "error_iframe_add_card.jpg")
             return False, f"在 iframe 中点击 'Add card' 失败: {e}"
         
         # Step 4: 填写卡号（在 iframe 中）
-        print(f"\n填写卡号: {card_info['number']}")
-        await asyncio.sleep(10)
+        print(f"\n填写卡号: {number}")
+        # 卡号/有效期/CVV 三个输入框都出现后再填写
+        await _wait_for(iframe_locator.locator('input').nth(2), 20000)
         
         try:
             # 简化策略：iframe 中有 3 个输入框，按顺序分别是：
@@ -414,68 +517,66 @@ async def auto_bind_card(page: Page, card_info: dict = None, account_info: dict
             if input_count < 3:
                 return False, f"输入框数量不足，只找到 {input_count} 个"
             
-            # 第1个输入框 = Card number
-            card_number_input = all_inputs.nth(0)
-            print("  使用第1个输入框作为卡号输入框")
-            
-            await card_number_input.click()
-            await card_number_input.fill(card_info['number'])
-            print("✅ 卡号已填写")
-            await asyncio.sleep(0.5)
+            # 三个输入框在浏览器端一次写入，回读值与期望不一致（被页面重置）或写入失败的字段
+            # 再逐个点击 + fill
+            values = (number, exp_value, cvv)
+            try:
+                filled = await all_inputs.evaluate_all(_FILL_CARD_JS, list(values))
+                refill = {i for i, (expected, actual) in enumerate(zip(values, filled))
+                          if _NON_DIGITS.sub('', str(expected)) != _NON_DIGITS.sub('', actual or '')}
+                if refill:
+                    print(f"  一次性填写后第 {sorted(i + 1 for i in refill)} 个输入框取值不一致，改为逐个填写")
+                else:
+                    print("✅ 卡号/过期日期/CVV 已一次性填写")
+            except PlaywrightError as e:
+                refill = {0, 1, 2}
+                print(f"  一次性填写失败，改为逐个填写: {e}")
+            
+            if 0 in refill:
+                # 第1个输入框 = Card number
+                card_number_input = all_inputs.nth(0)
+                print("  使用第1个输入框作为卡号输入框")
+            
+                await card_number_input.click()
+                await card_number_input.fill(number)
+                print("✅ 卡号已填写")
         except Exception as e:
             return False, f"填写卡号失败: {e}"
         
-        # Step 5: 填写过期日期 (MM/YY)
-        print(f"填写过期日期: {card_info['exp_month']}/{card_info['exp_year']}")
-        try:
-            # 第2个输入框 = MM/YY
-            exp_date_input = all_inputs.nth(1)
-            print("  使用第2个输入框作为过期日期输入框")
+        if 1 in refill:
+            # Step 5: 填写过期日期 (MM/YY)
+            print(f"填写过期日期: {exp_month}/{exp_year}")
+            try:
+                # 第2个输入框 = MM/YY
+                exp_date_input = all_inputs.nth(1)
+                print("  使用第2个输入框作为过期日期输入框")
             
-            await exp_date_input.click()
-            exp_value = f"{card_info['exp_month']}{card_info['exp_year']}"
-            await exp_date_input.fill(exp_value)
-            print("✅ 过期日期已填写")
-            await asyncio.sleep(0.5)
-        except Exception as e:
-            return False, f"填写过期日期失败: {e}"
+                await exp_date_input.click()
+                await exp_date_input.fill(exp_value)
+                print("✅ 过期日期已填写")
+            except Exception as e:
+                return False, f"填写过期日期失败: {e}"
         
-        # Step 6: 填写 CVV (Security code)
-        print(f"填写 CVV: {card_info['cvv']}")
-        try:
-            # 第3个输入框 = Security code
-            cvv_input = all_inputs.nth(2)
-            print("  使用第3个输入框作为CVV输入框")
+        if 2 in refill:
+            # Step 6: 填写 CVV (Security code)
+            print(f"填写 CVV: {cvv}")
+            try:
+                # 第3个输入框 = Security code
+                cvv_input = all_inputs.nth(2)
+                print("  使用第3个输入框作为CVV输入框")
             
-            await cvv_input.click()
-            await cvv_input.fill(card_info['cvv'])
-            print("✅ CVV已填写")
-            await asyncio.sleep(0.5)
-        except Exception as e:
-            return False, f"填写CVV失败: {e}"
+                await cvv_input.click()
+                await cvv_input.fill(cvv)
+                print("✅ CVV已填写")
+            except Exception as e:
+                return False, f"填写CVV失败: {e}"
         
         # Step 6: 点击 "Save card" 按钮
         print("点击 'Save card' 按钮...")
         try:
-            save_selectors = [
-                'button:has-text("Save card")',
-                'button:has-text("保存卡")',  # 中文
-                'button:has-text("Save")',
-                'button:has-text("保存")',  # 中文
-                'button[type="submit"]',
-            ]
-            
-            save_button = None
-            for selector in save_selectors:
-                try:
-                    element = iframe_locator.locator(selector).first
-                    count = await element.count()
-                    if count > 0:
-                        print(f"  找到 Save 按钮 (iframe, selector: {selector})")
-                        save_button = element
-                        break
-                except:
-                    continue
+            selector, save_button = await _first_match(iframe_locator, SAVE_CARD_SELECTORS)
+            if save_button:
+                print(f"  找到 Save 按钮 (iframe, selector: {selector})")
             
             if not save_button:
                 return False, "未找到 Save card 按钮"
@@ -487,121 +588,55 @@ async def auto_bind_card(page: Page, card_info: dict = None, account_info: dict
         
         # Step 7: 点击订阅按钮完成流程
         print("\n等待订阅页面加载...")
-        await asyncio.sleep(18)  # 增加延迟到18秒，确保订阅弹窗完全显示
-        await page.screenshot(path="step7_before_subscribe.png")
-        print("截图已保存: step7_before_subscribe.png")
+        # 订阅按钮出现即继续，最多等待18秒
+        await _wait_for(
+            outer.locator('span.UywwFc-vQzf8d:has-text("Subscribe")').first,
+            18000
+        )
+        _maybe_screenshot(page, cdp, "step7_before_subscribe.jpg")
         
         try:
             # 关键改变：订阅按钮在主页面的弹窗中，不在 iframe 中！
             print("查找订阅按钮...")
             
-            subscribe_selectors = [
-                # 用户提供的精确选择器 - 优先尝试
-                'span.UywwFc-vQzf8d:has-text("Subscribe")',
-                'span[jsname="V67aGc"]',
-                'span.UywwFc-vQzf8d',
-                # 其他备选
-                'span:has-text("Subscribe")',
-                ':text("Subscribe")',
-                'button:has-text("Subscribe")',
-                'button:has-text("订阅")',
-                'button:has-text("Start")',
-                'button:has-text("开始")',
-                'button:has-text("继续")',
-                'div[role="button"]:has-text("Subscribe")',
-                '[role="button"]:has-text("Subscribe")',
-                'button[type="submit"]',
-                # 根据截图，可能在 dialog 中
-                'dialog span:has-text("Subscribe")',
-                '[role="dialog"] span:has-text("Subscribe")',
-                'dialog button:has-text("Subscribe")',
-                '[role="dialog"] button:has-text("Subscribe")',
-            ]
-            
             subscribe_button = None
             
             # 优先在 iframe 中查找（订阅按钮在iframe中）
             print("在 iframe 中查找订阅按钮...")
             try:
-                iframe_locator_subscribe = page.frame_locator('iframe[src*="tokenized.play.google.com"]')
-                for selector in subscribe_selectors:
-                    try:
-                        element = iframe_locator_subscribe.locator(selector).first
-                        count = await element.count()
-                        if count > 0:
-                            print(f"  找到订阅按钮 (iframe, selector: {selector})")
-                            subscribe_button = element
-                            break
-                    except:
-                        continue
+                selector, subscribe_button = await _first_match(outer, SUBSCRIBE_FALLBACK_SELECTORS)
+                if subscribe_button:
+                    print(f"  找到订阅按钮 (iframe, selector: {selector})")
             except Exception as e:
                 print(f"  iframe查找失败: {e}")
             
             # 如果 iframe 中没找到，尝试在主页面查找
             if not subscribe_button:
                 print("在主页面中查找订阅按钮...")
-                for selector in subscribe_selectors:
-                    try:
-                        element = page.locator(selector).first
-                        count = await element.count()
-                        if count > 0:
-                            print(f"  找到订阅按钮 (main page, selector: {selector})")
-                            subscribe_button = element
-                            break
-                    except Exception as e:
-                        continue
+                selector, subscribe_button = await _first_match(page, SUBSCRIBE_FALLBACK_SELECTORS)
+                if subscribe_button:
+                    print(f"  找到订阅按钮 (main page, selector: {selector})")
             
             if subscribe_button:
                 print("准备点击订阅按钮...")
-                await asyncio.sleep(2)  # 点击前等待
-                await subscribe_button.click()
-                print("✅ 已点击订阅按钮")
+                state, detail = await _click_subscribe_and_verify(
+                    outer, page, cdp, subscribe_button, "step8_after_subscribe.jpg"
+                )
                 
-                # 等待10秒并验证订阅成功
-                await asyncio.sleep(10)
-                await page.screenshot(path="step8_after_subscribe.png")
-                print("截图已保存: step8_after_subscribe.png")
+                if state == 'subscribed':
+                    print("✅ 绑卡并订阅成功，已确认！")
+                    # 更新数据库状态为已订阅
+                    _mark_subscribed(account_info)
+                    return True, "绑卡并订阅成功 (Subscribed confirmed)"
                 
-                # 在 iframe 中检查是否显示 "Subscribed"
-                try:
-                    # 重新获取 iframe
-                    iframe_locator_final = page.frame_locator('iframe[src*="tokenized.play.google.com"]')
-                    
-                    subscribed_selectors = [
-                        ':text("Subscribed")',
-                        'text=Subscribed',
-                        '*:has-text("Subscribed")',
-                    ]
-                    
-                    subscribed_found = False
-                    for selector in subscribed_selectors:
-                        try:
-                            element = iframe_locator_final.locator(selector).first
-                            count = await element.count()
-                            if count > 0:
-                                print(f"  ✅ 检测到 'Subscribed'，订阅确认成功！")
-                                subscribed_found = True
-                                break
-                        except:
-                            continue
-                    
-                    if subscribed_found:
-                        print("✅ 绑卡并订阅成功，已确认！")
-                        # 更新数据库状态为已订阅
-                        if account_info and account_info.get('email'):
-                            line = f"{account_info.get('email', '')}----{account_info.get('password', '')}----{account_info.get('backup', '')}----{account_info.get('secret', '')}"
-                            AccountManager.move_to_subscribed(line)
-                        return True, "绑卡并订阅成功 (Subscribed confirmed)"
-                    else:
-                        print("⚠️ 未检测到 'Subscribed'，但可能仍然成功")
-                        # 更新数据库状态为已订阅
-                        if account_info and account_info.get('email'):
-                            line = f"{account_info.get('email', '')}----{account_info.get('password', '')}----{account_info.get('backup', '')}----{account_info.get('secret', '')}"
-                            AccountManager.move_to_subscribed(line)
-                        return True, "绑卡并订阅成功 (Subscribed)"
-                except Exception as e:
-                    print(f"验证订阅状态时出错: {e}")
-                    return True, "绑卡并订阅成功 (Subscribed)"
+                if state == 'error':
+                    print(f"❌ 订阅失败: {detail}")
+                    return False, f"订阅失败: {detail}"
+                
+                print("⚠️ 未检测到 'Subscribed'，但可能仍然成功")
+                # 更新数据库状态为已订阅
+                _mark_subscribed(account_info)
+                return True, "绑卡并订阅成功 (Subscribed)"
             else:
                 print("⚠️ 未找到订阅按钮，可能已自动完成")
                 print("✅ 绑卡成功")
@@ -609,122 +644,166 @@ async def auto_bind_card(page: Page, card_info: dict = None, account_info: dict
                 
         except Exception as e:
             print(f"点击订阅按钮时出错: {e}")
-            import traceback
-            traceback.print_exc()
+            if DEBUG_TRACEBACK:
+                import traceback
+                traceback.print_exc()
             print("✅ 绑卡已完成（订阅步骤可能需要手动）")
             return True, "绑卡已完成"
         
     except Exception as e:
         print(f"❌ 绑卡过程出错: {e}")
-        import traceback
-        traceback.print_exc()
+        if DEBUG_TRACEBACK:
+            import traceback
+            traceback.print_exc()
         return False, f"绑卡错误: {str(e)}"
 
 
-async def test_bind_card_with_browser(browser_id: str, account_info: dict = None):
-    """
-    测试绑卡功能
+def _resolve_account_info(browser_id: str):
+    """从数据库或浏览器 remark 中获取账号信息，都获取不到时返回 None"""
+    from create_window import get_browser_info
+    account_info = None
     
-    Args:
-        browser_id: 浏览器窗口ID
-        account_info: 账号信息 {'email', 'password', 'secret'}（可选，如果不提供则从浏览器remark中获取）
-    """
-    print(f"正在打开浏览器: {browser_id}...")
+    # 1. 尝试从数据库获取
+    try:
+        from database import DBManager
+        row = DBManager.fetch_account(browser_id)
+        
+        if row and row['password']:
+            print(f"✅ 从数据库获取到账号信息: {row['email']}")
+            account_info = {
+                'email': row['email'],
+                'password': row['password'],
+                'backup': row['recovery_email'],
+                'secret': row['secret_key'],
+                '2fa_secret': row['secret_key'],
+                'backup_email': row['recovery_email']
+            }
+    except Exception as e:
+        print(f"⚠️ 从数据库获取失败: {e}")
     
-    # 如果没有提供账号信息，尝试从浏览器信息中获取
+    # 2. 尝试从备注获取
     if not account_info:
-        print("未提供账号信息，尝试从数据库或浏览器remark中获取...")
-        from create_window import get_browser_info
-        
-        # 1. 尝试从数据库获取
-        try:
-            from database import DBManager
-            conn = DBManager.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT email, password, recovery_email, secret_key FROM accounts WHERE browser_id = ?", (browser_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row and row[1]:
-                print(f"✅ 从数据库获取到账号信息: {row[0]}")
-                account_info = {
-                    'email': row[0],
-                    'password': row[1],
-                    'backup': row[2],
-                    'secret': row[3],
-                    '2fa_secret': row[3],
-                    'backup_email': row[2]
-                }
-        except Exception as e:
-            print(f"⚠️ 从数据库获取失败: {e}")
-        
-        # 2. 尝试从备注获取
-        if not account_info:
-            target_browser = get_browser_info(browser_id)
-            if target_browser:
-                remark = target_browser.get('remark', '')
-                parts = remark.split('----')
-                
-                if len(parts) >= 4:
-                    account_info = {
-                        'email': parts[0].strip(),
-                        'password': parts[1].strip(),
-                        'backup': parts[2].strip(),
-                        'secret': parts[3].strip()
-                    }
-                    print(f"✅ 从remark获取到账号信息: {account_info.get('email')}")
-                else:
-                    print("⚠️ remark格式不正确，可能需要手动登录")
-                    account_info = None
+        target_browser = get_browser_info(browser_id)
+        if target_browser:
+            remark = target_browser.get('remark', '')
+            # 最多切 4 刀：第 5 段及之后的备注内容不会混进 secret
+            parts = remark.split('----', 4)
+            
+            if len(parts) >= 4:
+                account_info = dict(zip(ACCOUNT_FIELDS, (p.strip() for p in parts)))
+                print(f"✅ 从remark获取到账号信息: {account_info.get('email')}")
             else:
-                print("⚠️ 无法获取浏览器信息")
+                print("⚠️ remark格式不正确，可能需要手动登录")
                 account_info = None
+        else:
+            print("⚠️ 无法获取浏览器信息")
+            account_info = None
     
-    result = openBrowser(browser_id)
+    return account_info
+
+
+class BindWorker:
+    """
+    批量绑卡：多个窗口共用一个 Playwright 驱动进程（只启动一次），
+    每个窗口单独 connect_over_cdp，并发连接数由信号量限制
     
-    if not result.get('success'):
-        return False, f"打开浏览器失败: {result}"
+    用法:
+        async with BindWorker() as worker:
+            await asyncio.gather(*[worker.bind(bid, acc) for bid, acc in jobs])
+    """
     
-    ws_endpoint = result['data']['ws']
-    print(f"WebSocket URL: {ws_endpoint}")
+    def __init__(self, max_concurrency: int = 4):
+        self._playwright = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
     
-    async with async_playwright() as playwright:
-        try:
-            chromium = playwright.chromium
-            browser = await chromium.connect_over_cdp(ws_endpoint)
-            context = browser.contexts[0]
-            page = context.pages[0] if context.pages else await context.new_page()
-            
-            # 导航到目标页面
-            target_url = "https://one.google.com/ai-student?g1_landing_page=75&utm_source=antigravity&utm_campaign=argon_limit_reached"
-            print(f"导航到: {target_url}")
-            await page.goto(target_url, wait_until='domcontentloaded', timeout=30000)
-            
-            # 等待页面加载
-            print("等待页面完全加载...")
-            await asyncio.sleep(5)  # 增加等待时间以确保弹窗有机会出现
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._playwright.stop()
+        self._playwright = None
+    
+    async def bind(self, browser_id: str, account_info: dict = None, card_info: dict = None):
+        """
+        打开指定窗口并执行绑卡
+        
+        Args:
+            browser_id: 浏览器窗口ID
+            account_info: 账号信息 {'email', 'password', 'secret'}（可选，如果不提供则从数据库或浏览器remark中获取）
+            card_info: 卡信息（可选，默认测试卡）
+        """
+        async with self._semaphore:
+            print(f"正在打开浏览器: {browser_id}...")
             
-            # 执行自动绑卡（包含登录检测）
-            success, message = await auto_bind_card(page, account_info=account_info)
+            # 如果没有提供账号信息，尝试从浏览器信息中获取
+            if not account_info:
+                print("未提供账号信息，尝试从数据库或浏览器remark中获取...")
+                account_info = await asyncio.to_thread(_resolve_account_info, browser_id)
             
-            print(f"\n{'='*50}")
-            print(f"绑卡结果: {message}")
-            print(f"{'='*50}\n")
+            result = await asyncio.to_thread(openBrowser, browser_id)
             
-            # 保持浏览器打开以便查看结果
-            print("绑卡流程完成。浏览器将保持打开状态。")
+            if not result.get('success'):
+                return False, f"打开浏览器失败: {result}"
             
-            return True, message
+            ws_endpoint = result['data']['ws']
+            print(f"WebSocket URL: {ws_endpoint}")
             
-        except Exception as e:
-            print(f"测试过程出错: {e}")
-            import traceback
-            traceback.print_exc()
-            return False, str(e)
-        finally:
-            # 不关闭浏览器，方便查看结果
-            # closeBrowser(browser_id)
-            pass
+            browser = None
+            try:
+                browser = await self._playwright.chromium.connect_over_cdp(ws_endpoint)
+                context = browser.contexts[0]
+                page = context.pages[0] if context.pages else await context.new_page()
+                await block_heavy_resources(page)
+                
+                # 导航到目标页面
+                target_url = "https://one.google.com/ai-student?g1_landing_page=75&utm_source=antigravity&utm_campaign=argon_limit_reached"
+                print(f"导航到: {target_url}")
+                # 导航一开始提交就返回，再等真正需要的元素：优惠按钮、登录框或付款 iframe 任一出现即可继续
+                await page.goto(target_url, wait_until='commit', timeout=30000)
+                await _wait_for(
+                    page.locator('button:has-text("Get student offer"), input[type="email"], iframe[src*="tokenized"]').first,
+                    20000,
+                    state='attached'
+                )
+                
+                # 执行自动绑卡（包含登录检测，检测期间同时等待页面弹窗/iframe 出现）
+                success, message = await auto_bind_card(page, card_info=card_info, account_info=account_info)
+                
+                print(f"\n{'='*50}")
+                print(f"绑卡结果: {message}")
+                print(f"{'='*50}\n")
+                
+                # 保持浏览器打开以便查看结果
+                print("绑卡流程完成。浏览器将保持打开状态。")
+                
+                return True, message
+                
+            except Exception as e:
+                print(f"测试过程出错: {e}")
+                if DEBUG_TRACEBACK:
+                    import traceback
+                    traceback.print_exc()
+                return False, str(e)
+            finally:
+                # 只断开 CDP 连接，不关闭浏览器窗口，方便查看结果
+                if browser:
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
+
+
+async def test_bind_card_with_browser(browser_id: str, account_info: dict = None):
+    """
+    测试绑卡功能
+    
+    Args:
+        browser_id: 浏览器窗口ID
+        account_info: 账号信息 {'email', 'password', 'secret'}（可选，如果不提供则从浏览器remark中获取）
+    """
+    async with BindWorker(max_concurrency=1) as worker:
+        return await worker.bind(browser_id, account_info)
 
 
 if __name__ == "__main__":
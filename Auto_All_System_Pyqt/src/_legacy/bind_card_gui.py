@@ -4,19 +4,36 @@
 import sys
 import os
 import asyncio
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
-                              QPushButton, QLabel, QLineEdit, QTextEdit, 
+                              QPushButton, QLabel, QLineEdit, QPlainTextEdit, 
                               QTableWidget, QTableWidgetItem, QHeaderView,
                               QMessageBox, QCheckBox, QSpinBox, QGroupBox,
                               QFormLayout)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from bit_api import openBrowser, closeBrowser
-from create_window import get_browser_info
-from auto_bind_card import auto_bind_card
+from auto_bind_card import auto_bind_card, block_heavy_resources, ACCOUNT_FIELDS
 from database import DBManager
 
+try:
+    # 可选依赖（仅 Linux/macOS）：安装后工作线程改用 uvloop 事件循环，回调开销更低
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# 卡片使用计数：攒够该数量的成功绑卡后再在一个事务里统一写库
+CARD_USAGE_FLUSH_SIZE = 16
+
+# 日志框最多保留的行数
+LOG_MAX_LINES = 2000
+
+# 加载账号列表时并发执行数据库查询和浏览器列表请求
+_load_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bind-card-load')
+
 class BindCardWorker(QThread):
     """绑卡工作线程"""
     progress_signal = pyqtSignal(str, str, str)  # browser_id, status, message
@@ -31,66 +48,57 @@ class BindCardWorker(QThread):
         self.delays = delays  # 延迟设置字典
         self.thread_count = thread_count  # 并发数
         self.is_running = True
+        self._card_usage = Counter()  # 待写库的卡片使用次数（卡片 id -> 本轮新增次数）
+        self.errors = []  # 处理过程中的异常堆栈，任务结束后统一输出
     
     def run(self):
         try:
-            asyncio.run(self._process_all())
+            if uvloop is not None:
+                uvloop.run(self._process_all())
+            else:
+                asyncio.run(self._process_all())
         except Exception as e:
             self.log_signal.emit(f"❌ 工作线程错误: {e}")
-            import traceback
-            traceback.print_exc()
+            self.errors.append(traceback.format_exc())
         finally:
             self.finished_signal.emit()
     
     async def _process_all(self):
         """处理所有账号的绑卡（支持并发）"""
-        card_index = 0
-        card_usage_count = 0
-        
-        # 将账号分批处理，每批 thread_count 个
-        for batch_start in range(0, len(self.accounts), self.thread_count):
-            if not self.is_running:
+        # 先为每个账号分配卡片：每张卡绑 cards_per_account 个账号，卡用完后的账号不处理
+        pairs = []
+        for i, account in enumerate(self.accounts):
+            card_index = i // self.cards_per_account
+            if card_index >= len(self.cards):
+                self.log_signal.emit("⚠️ 卡片已用完，停止处理")
                 break
-            
-            batch_end = min(batch_start + self.thread_count, len(self.accounts))
-            batch_accounts = self.accounts[batch_start:batch_end]
-            
-            self.log_signal.emit(f"\n{'='*50}")
-            self.log_signal.emit(f"并发处理第 {batch_start+1}-{batch_end} 个账号（共 {len(self.accounts)} 个）")
-            self.log_signal.emit(f"{'='*50}")
-            
-            # 为每个账号分配卡片
-            tasks = []
-            for i, account in enumerate(batch_accounts):
-                global_index = batch_start + i
-                
-                # 检查是否需要切换到下一张卡
-                if card_usage_count >= self.cards_per_account:
-                    card_index += 1
-                    card_usage_count = 0
-                    self.log_signal.emit(f"💳 切换到下一张卡 (卡 #{card_index + 1})")
-                
-                # 检查卡是否用完
-                if card_index >= len(self.cards):
-                    self.log_signal.emit("⚠️ 卡片已用完，停止处理")
-                    break
-                
-                current_card = self.cards[card_index]
-                
-                # 创建异步任务
-                task = self._process_single_account_wrapper(
-                    account, 
-                    current_card, 
-                    global_index + 1
+            if i and i % self.cards_per_account == 0:
+                self.log_signal.emit(f"💳 切换到下一张卡 (卡 #{card_index + 1})")
+            pairs.append((account, self.cards[card_index]))
+        
+        self.log_signal.emit(f"\n{'='*50}")
+        self.log_signal.emit(f"并发处理 {len(pairs)} 个账号（共 {len(self.accounts)} 个，并发数 {self.thread_count}）")
+        self.log_signal.emit(f"{'='*50}")
+        
+        # 所有账号一起排队，信号量限制同时运行的数量：任一账号完成后立即开始下一个，不必等整批结束
+        semaphore = asyncio.Semaphore(self.thread_count)
+        # 整个任务只启动一次 Playwright 驱动，各账号只需 connect_over_cdp 到自己的窗口
+        try:
+            async with async_playwright() as playwright:
+                await asyncio.gather(
+                    *(self._slot(semaphore, playwright, account, card, index + 1)
+                      for index, (account, card) in enumerate(pairs)),
+                    return_exceptions=True
                 )
-                tasks.append(task)
-                card_usage_count += 1
-            
-            # 并发执行这一批
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await self._flush_card_usage()
     
-    async def _process_single_account_wrapper(self, account, card_info, index):
+    async def _slot(self, semaphore, playwright, account, card_info, index):
+        """占用一个并发名额处理单个账号"""
+        async with semaphore:
+            await self._process_single_account_wrapper(playwright, account, card_info, index)
+    
+    async def _process_single_account_wrapper(self, playwright, account, card_info, index):
         """单个账号处理的包装器"""
         if not self.is_running:
             return
@@ -103,20 +111,18 @@ class BindCardWorker(QThread):
         
         try:
             success, message = await self._process_single_account(
-                browser_id, email, card_info
+                playwright, account, card_info
             )
             
             if success:
                 self.progress_signal.emit(browser_id, "✅ 成功", message)
                 self.log_signal.emit(f"[{index}] ✅ {email}: {message}")
                 
-                # 更新卡片使用计数
+                # 记录卡片使用，攒够一批后统一写库
                 if card_info and card_info.get('id'):
-                    try:
-                        from database import DBManager
-                        DBManager.increment_card_usage(card_info['id'])
-                    except Exception as e:
-                        self.log_signal.emit(f"[{index}] ⚠️ 更新卡片使用计数失败: {e}")
+                    self._card_usage[card_info['id']] += 1
+                    if sum(self._card_usage.values()) >= CARD_USAGE_FLUSH_SIZE:
+                        await self._flush_card_usage()
             else:
                 self.progress_signal.emit(browser_id, "❌ 失败", message)
                 self.log_signal.emit(f"[{index}] ❌ {email}: {message}")
@@ -126,60 +132,73 @@ class BindCardWorker(QThread):
             self.progress_signal.emit(browser_id, "❌ 错误", error_msg)
             self.log_signal.emit(f"[{index}] ❌ {email}: {error_msg}")
     
-    async def _process_single_account(self, browser_id, email, card_info):
+    async def _flush_card_usage(self):
+        """把累积的卡片使用计数在后台线程中一次性写入数据库，不阻塞事件循环"""
+        usage, self._card_usage = self._card_usage, Counter()
+        if not usage:
+            return
+        try:
+            await asyncio.to_thread(DBManager.bulk_increment_card_usage, usage)
+        except Exception as e:
+            self.log_signal.emit(f"⚠️ 更新卡片使用计数失败: {e}")
+    
+    async def _process_single_account(self, playwright, account, card_info):
         """处理单个账号的绑卡"""
+        browser_id = account.get('browser_id')
         try:
-            # 获取账号信息
-            target_browser = get_browser_info(browser_id)
-            if not target_browser:
-                return False, "无法获取浏览器信息"
-            
-            remark = target_browser.get('remark', '')
-            parts = remark.split('----')
+            # 账号信息取自加载列表时记录的窗口 remark（email----password----backup----secret）
+            parts = account.get('remark', '').split('----', 4)
             
             account_info = None
             if len(parts) >= 4:
-                account_info = {
-                    'email': parts[0].strip(),
-                    'password': parts[1].strip(),
-                    'backup': parts[2].strip(),
-                    'secret': parts[3].strip()
-                }
+                account_info = dict(zip(ACCOUNT_FIELDS, (p.strip() for p in parts)))
             
-            # 打开浏览器
-            result = openBrowser(browser_id)
+            # 打开浏览器（同步 HTTP 请求放到线程池，各账号的打开请求可以同时进行）
+            result = await asyncio.to_thread(openBrowser, browser_id)
             if not result.get('success'):
                 return False, f"打开浏览器失败: {result}"
             
             ws_endpoint = result['data']['ws']
             
-            async with async_playwright() as playwright:
+            browser = None
+            try:
+                browser = await playwright.chromium.connect_over_cdp(ws_endpoint)
+                context = browser.contexts[0]
+                page = context.pages[0] if context.pages else await context.new_page()
+                # 不加载图片/字体和统计请求（付款、登录域名除外）
+                await block_heavy_resources(page)
+                
+                # 导航到目标页面
+                target_url = "https://one.google.com/ai-student?g1_landing_page=75&utm_source=antigravity&utm_campaign=argon_limit_reached"
+                await page.goto(target_url, wait_until='domcontentloaded', timeout=30000)
+                
+                # 等待页面加载：优惠按钮、登录框或付款 iframe 任一出现即可继续，最多 20 秒
                 try:
-                    chromium = playwright.chromium
-                    browser = await chromium.connect_over_cdp(ws_endpoint)
-                    context = browser.contexts[0]
-                    page = context.pages[0] if context.pages else await context.new_page()
-                    
-                    # 导航到目标页面
-                    target_url = "https://one.google.com/ai-student?g1_landing_page=75&utm_source=antigravity&utm_campaign=argon_limit_reached"
-                    await page.goto(target_url, wait_until='domcontentloaded', timeout=30000)
-                    
-                    # 等待页面加载
-                    await asyncio.sleep(5)
-                    
-                    # 执行自动绑卡（使用自定义延迟）
-                    # TODO: 需要修改 auto_bind_card 函数支持自定义延迟
-                    success, message = await auto_bind_card(page, card_info=card_info, account_info=account_info)
-                    
-                    return success, message
-                    
-                except Exception as e:
-                    import traceback
-                    traceback.print_exc()
-                    return False, str(e)
-                finally:
-                    # 不关闭浏览器
+                    await page.wait_for_selector(
+                        'button:has-text("Get student offer"), input[type="email"], iframe[src*="tokenized"]',
+                        state='attached',
+                        timeout=20000
+                    )
+                except PlaywrightTimeoutError:
                     pass
+                
+                # 执行自动绑卡（使用自定义延迟）
+                # TODO: 需要修改 auto_bind_card 函数支持自定义延迟
+                success, message = await auto_bind_card(page, card_info=card_info, account_info=account_info)
+                
+                return success, message
+                
+            except Exception as e:
+                # 只记录堆栈，不在各协程里直接写 stderr，任务结束后统一输出
+                self.errors.append(f"{account.get('email')}:\n{traceback.format_exc()}")
+                return False, str(e)
+            finally:
+                # 只断开 CDP 连接，不关闭浏览器窗口
+                if browser:
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
                     
         except Exception as e:
             return False, str(e)
@@ -192,9 +211,23 @@ class BindCardWorker(QThread):
 class BindCardWindow(QWidget):
     """一键绑卡订阅窗口"""
     
+    accounts_loaded = pyqtSignal(object)  # 后台加载完成的 (账号行, 浏览器列表)，或加载失败的异常
+    
     def __init__(self):
         super().__init__()
         self.worker = None
+        self.accounts = []  # 后台加载完成前为空
+        self.accounts_loaded.connect(self._on_accounts_loaded)
+        self._browser_id_to_row = {}  # browser_id -> 表格行号，load_accounts 时建立
+        # 状态更新先按 browser_id 合并、日志先进缓冲区，由定时器每 100ms 写入界面一次，
+        # 避免并发账号的信号刷爆 UI 线程
+        self._pending_status = {}
+        self._log_buffer = []
+        self._status_timer = QTimer(self)
+        self._status_timer.setInterval(100)
+        self._status_timer.timeout.connect(self._flush_status)
+        self._status_timer.timeout.connect(self._flush_log)
+        self._status_timer.start()
         self.initUI()
         self.load_accounts()
         self.load_cards()
@@ -288,7 +321,9 @@ class BindCardWindow(QWidget):
         log_label = QLabel("运行日志:")
         layout.addWidget(log_label)
         
-        self.log_text = QTextEdit()
+        # 纯文本日志框：追加时不走富文本解析，超出行数自动丢弃最早的日志
+        self.log_text = QPlainTextEdit()
+        self.log_text.setMaximumBlockCount(LOG_MAX_LINES)
         self.log_text.setReadOnly(True)
         self.log_text.setMaximumHeight(150)
         layout.addWidget(self.log_text)
@@ -345,31 +380,56 @@ class BindCardWindow(QWidget):
             import traceback
             traceback.print_exc()
     
+    @staticmethod
+    def _query_verified_accounts():
+        """查询 verified 状态的账号（已验证未绑卡）"""
+        DBManager.init_db()
+        conn = DBManager.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT email, password, recovery_email, secret_key, verification_link 
+            FROM accounts 
+            WHERE status = 'verified'
+            ORDER BY email
+        """)
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
     def load_accounts(self):
-        """从数据库加载已验证未绑卡的账号，并匹配浏览器ID"""
+        """从数据库加载已验证未绑卡的账号，并匹配浏览器ID（后台加载，不阻塞界面）"""
         try:
             from create_window import get_browser_list
+        except Exception as e:
+            self.log(f"❌ 加载账号失败: {e}")
+            return
+        
+        # 数据库查询和浏览器列表 HTTP 请求互不依赖，放到两个线程里同时进行
+        rows_future = _load_executor.submit(self._query_verified_accounts)
+        browsers_future = _load_executor.submit(get_browser_list, page=0, pageSize=1000)
+        
+        def _emit(_):
+            try:
+                result = (rows_future.result(), browsers_future.result())
+            except Exception as e:
+                result = e
+            self.accounts_loaded.emit(result)
+        
+        # 两个任务都完成后才回调一次（第二个已完成时 add_done_callback 立即执行），经信号回到界面线程
+        rows_future.add_done_callback(lambda _: browsers_future.add_done_callback(_emit))
+    
+    def _on_accounts_loaded(self, result):
+        """后台加载完成后在界面线程中匹配浏览器ID并填充表格"""
+        if isinstance(result, BaseException):
+            self.log(f"❌ 加载账号失败: {result}")
+            return
+        
+        try:
+            rows, browsers = result
             
-            DBManager.init_db()
-            conn = DBManager.get_connection()
-            cursor = conn.cursor()
-            
-            # 查询 verified 状态的账号（使用正确的字段名）
-            cursor.execute("""
-                SELECT email, password, recovery_email, secret_key, verification_link 
-                FROM accounts 
-                WHERE status = 'verified'
-                ORDER BY email
-            """)
-            
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 获取所有浏览器窗口
-            browsers = get_browser_list(page=0, pageSize=1000)
-            
-            # 创建 email -> browser_id 的映射
+            # 创建 email -> browser_id / remark 的映射（remark 随账号带给绑卡线程，不再逐个查询窗口信息）
             email_to_browser = {}
+            email_to_remark = {}
             for browser in browsers:
                 remark = browser.get('remark', '')
                 # remark 格式: email----password----backup----secret
@@ -379,9 +439,12 @@ class BindCardWindow(QWidget):
                         browser_email = parts[0].strip()
                         browser_id = browser.get('id', '')
                         email_to_browser[browser_email] = browser_id
+                        email_to_remark[browser_email] = remark
             
             self.table.setRowCount(0)
             self.accounts = []
+            self._browser_id_to_row = {}
+            self._pending_status.clear()
             
             for row in rows:
                 email = row[0]
@@ -399,23 +462,21 @@ class BindCardWindow(QWidget):
                     'backup': row[2] or '',  # recovery_email 字段
                     'secret': row[3] or '',  # secret_key 字段
                     'link': row[4] or '',    # verification_link 字段
-                    'browser_id': browser_id
+                    'browser_id': browser_id,
+                    'remark': email_to_remark.get(email, '')
                 }
                 self.accounts.append(account)
                 
                 # 添加到表格
                 row_idx = self.table.rowCount()
                 self.table.insertRow(row_idx)
+                self._browser_id_to_row[browser_id] = row_idx
                 
-                # 复选框（默认选中）
-                checkbox = QCheckBox()
-                checkbox.setChecked(True)
-                checkbox_widget = QWidget()
-                checkbox_layout = QHBoxLayout(checkbox_widget)
-                checkbox_layout.addWidget(checkbox)
-                checkbox_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                checkbox_layout.setContentsMargins(0, 0, 0, 0)
-                self.table.setCellWidget(row_idx, 0, checkbox_widget)
+                # 复选框（默认选中）：可勾选的单元格，不再为每行创建控件和布局
+                check_item = QTableWidgetItem()
+                check_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+                check_item.setCheckState(Qt.CheckState.Checked)
+                self.table.setItem(row_idx, 0, check_item)
                 
                 self.table.setItem(row_idx, 1, QTableWidgetItem(account['email']))
                 self.table.setItem(row_idx, 2, QTableWidgetItem(account['browser_id']))
@@ -436,24 +497,19 @@ class BindCardWindow(QWidget):
     
     def toggle_select_all(self, state):
         """全选/取消全选"""
-        is_checked = (state == Qt.CheckState.Checked.value)
+        check_state = Qt.CheckState.Checked if state == Qt.CheckState.Checked.value else Qt.CheckState.Unchecked
         for row in range(self.table.rowCount()):
-            checkbox_widget = self.table.cellWidget(row, 0)
-            if checkbox_widget:
-                checkbox = checkbox_widget.findChild(QCheckBox)
-                if checkbox:
-                    checkbox.setChecked(is_checked)
+            item = self.table.item(row, 0)
+            if item:
+                item.setCheckState(check_state)
     
     def get_selected_accounts(self):
         """获取选中的账号列表"""
         selected = []
-        for row in range(self.table.rowCount()):
-            checkbox_widget = self.table.cellWidget(row, 0)
-            if checkbox_widget:
-                checkbox = checkbox_widget.findChild(QCheckBox)
-                if checkbox and checkbox.isChecked():
-                    if row < len(self.accounts):
-                        selected.append(self.accounts[row])
+        for row in range(min(self.table.rowCount(), len(self.accounts))):
+            item = self.table.item(row, 0)
+            if item and item.checkState() == Qt.CheckState.Checked:
+                selected.append(self.accounts[row])
         return selected
     
     def start_binding(self):
@@ -516,20 +572,41 @@ class BindCardWindow(QWidget):
         self.btn_start.setEnabled(True)
         self.btn_stop.setEnabled(False)
         self.btn_refresh.setEnabled(True)
+        self._flush_status()
+        if self.worker and self.worker.errors:
+            self.log(f"\n⚠️ 处理过程中出现 {len(self.worker.errors)} 个异常:")
+            self.log('\n'.join(self.worker.errors))
         self.log("\n✅ 批量绑卡订阅任务完成！")
+        self._flush_log()
         QMessageBox.information(self, "完成", "批量绑卡订阅任务已完成")
     
     def update_account_status(self, browser_id, status, message):
-        """更新表格中的账号状态"""
-        for row in range(self.table.rowCount()):
-            if self.table.item(row, 2) and self.table.item(row, 2).text() == browser_id:
-                self.table.setItem(row, 3, QTableWidgetItem(status))
-                self.table.setItem(row, 4, QTableWidgetItem(message))
-                break
+        """记录账号状态（同一账号只保留最新一条，由 _flush_status 批量写入表格）"""
+        self._pending_status[browser_id] = (status, message)
+    
+    def _flush_status(self):
+        """将待更新的账号状态一次性写入表格"""
+        if not self._pending_status:
+            return
+        pending, self._pending_status = self._pending_status, {}
+        for browser_id, (status, message) in pending.items():
+            row = self._browser_id_to_row.get(browser_id)
+            if row is None:
+                continue
+            self.table.item(row, 3).setText(status)
+            self.table.item(row, 4).setText(message)
     
     def log(self, message):
-        """添加日志"""
-        self.log_text.append(message)
+        """添加日志（写入缓冲区，由 _flush_log 批量输出）"""
+        self._log_buffer.append(message)
+    
+    def _flush_log(self):
+        """将缓冲区中的日志一次性追加到日志框"""
+        if not self._log_buffer:
+            return
+        text = '\n'.join(self._log_buffer)
+        self._log_buffer.clear()
+        self.log_text.appendPlainText(text)
         # 滚动到底部
         scrollbar = self.log_text.verticalScrollBar()
         scrollbar.setValue(scrollbar.maximum())
@@ -2,19 +2,25 @@
 创建比特浏览器新窗口
 根据示例窗口的参数创建新窗口，从accounts.txt读取账户信息
 """
-import requests
 import json
 import os
 import time
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+import asyncio
+import itertools
+from bit_api import session, post_json
 
 # 比特浏览器API地址
 url = "http://127.0.0.1:54345"
 headers = {'Content-Type': 'application/json'}
 
+# accounts.txt / proxies.txt 所在目录（_legacy 的上一级），导入时算一次
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 账号文件解析用到的正则，模块加载时编译一次
+_TOTP_RE = re.compile(r'^[A-Z0-9]{16,}$')  # 2FA密钥：16位以上大写字母和数字（Base32）
+_SEP_RE = re.compile(r'["\'](.+?)["\']')  # 分隔符配置行引号内的内容
+
 
 def read_proxies(file_path: str = None) -> list:
     """
@@ -50,6 +56,30 @@ def read_proxies(file_path: str = None) -> list:
         return []
 
 
+def _separator_from_lines(lines) -> str:
+    """
+    从文件顶部的行中找分隔符配置，遇到第一条账号行即停止
+    
+    Returns:
+        分隔符字符串，默认为 "----"
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        # 查找分隔符配置行
+        if line.startswith('分隔符=') or line.startswith('separator='):
+            # 提取引号内的内容
+            match = _SEP_RE.search(line)
+            if match:
+                return match.group(1)
+        # 如果遇到非注释、非配置行，停止搜索
+        if not line.startswith('#') and '=' not in line:
+            break
+    
+    return "----"
+
+
 def read_separator_config(file_path: str) -> str:
     """
     从文件顶部读取分隔符配置
@@ -66,20 +96,7 @@ def read_separator_config(file_path: str) -> str:
     
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                # 查找分隔符配置行
-                if line.startswith('分隔符=') or line.startswith('separator='):
-                    # 提取引号内的内容
-                    import re
-                    match = re.search(r'["\'](.+?)["\']', line)
-                    if match:
-                        return match.group(1)
-                # 如果遇到非注释、非配置行，停止搜索
-                if not line.startswith('#') and '=' not in line:
-                    break
+            return _separator_from_lines(f)
     except Exception:
         pass
     
@@ -97,12 +114,8 @@ def parse_account_line(line: str, separator: str) -> dict:
     Returns:
         解析后的账号字典
     """
-    import re
-    
     # 移除注释
-    if '#' in line:
-        comment_pos = line.find('#')
-        line = line[:comment_pos].strip()
+    line = line.partition('#')[0].strip()
     
     if not line:
         return None
@@ -131,7 +144,7 @@ def parse_account_line(line: str, separator: str) -> dict:
         if '@' in part and '.' in part:
             # 邮箱格式：包含@和.
             emails.append(part)
-        elif re.match(r'^[A-Z0-9]{16,}$', part):
+        elif _TOTP_RE.match(part):
             # 2FA密钥格式：16位以上，只包含大写字母和数字（常见Base32编码）
             secrets.append(part)
         else:
@@ -153,9 +166,9 @@ def parse_account_line(line: str, separator: str) -> dict:
     return result if result['email'] else None
 
 
-def read_accounts(file_path: str) -> list:
+def iter_accounts(file_path: str):
     """
-    读取账户信息文件（使用配置的分隔符）
+    逐行解析账户信息文件（生成器，边读边产出账户，不把整个文件读进内存）
     
     文件格式：
     第一行（可选）：分隔符="----"
@@ -164,22 +177,27 @@ def read_accounts(file_path: str) -> list:
     Args:
         file_path: 账户文件路径
         
-    Returns:
-        账户列表，每个账户为字典格式
+    Yields:
+        账户字典
     """
-    accounts = []
-    
     if not os.path.exists(file_path):
         print(f"错误: 找不到文件 {file_path}")
-        return accounts
-    
-    # 读取分隔符配置
-    separator = read_separator_config(file_path)
-    print(f"使用分隔符: '{separator}'")
+        return
     
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
+            # 先读到第一条账号行为止确定分隔符，已读的行接在前面继续解析（整个文件只读一遍）
+            head = []
+            for line in f:
+                head.append(line)
+                stripped = line.strip()
+                if stripped and not stripped.startswith('#') and '=' not in stripped:
+                    break
+            
+            separator = _separator_from_lines(head)
+            print(f"使用分隔符: '{separator}'")
+            
+            for line_num, line in enumerate(itertools.chain(head, f), 1):
                 line = line.strip()
                 
                 # 跳过空行和注释
@@ -192,49 +210,89 @@ def read_accounts(file_path: str) -> list:
                 
                 account = parse_account_line(line, separator)
                 if account:
-                    accounts.append(account)
+                    yield account
                 else:
                     print(f"警告: 第{line_num}行格式不正确: {line[:50]}")
     except Exception as e:
         print(f"读取文件出错: {e}")
+
+
+def read_accounts(file_path: str) -> list:
+    """
+    读取账户信息文件（使用配置的分隔符）
     
-    return accounts
+    Args:
+        file_path: 账户文件路径
+        
+    Returns:
+        账户列表，每个账户为字典格式；需要边解析边处理时用 iter_accounts
+    """
+    return list(iter_accounts(file_path))
 
 
-def get_browser_list(page: int = 0, pageSize: int = 50):
+# 窗口列表短时缓存：批量创建时取名、查重、取详情都要扫一遍列表，5 秒内复用同一份
+LIST_CACHE_TTL = 5
+_list_cache = {}  # (page, pageSize) -> {'ts': 获取时间, 'data': 窗口列表, 'total': 窗口总数, 'index': id -> 窗口}
+
+
+def invalidate_browser_list_cache():
+    """创建/修改/删除窗口后调用，下次读取列表时重新请求"""
+    _list_cache.clear()
+
+
+def get_browser_page(page: int = 0, pageSize: int = 50):
     """
-    获取所有窗口列表
+    获取一页窗口及窗口总数（LIST_CACHE_TTL 秒内重复调用直接返回缓存）
     
     Args:
         page: 页码，默认为0
         pageSize: 每页数量，默认为50
     
     Returns:
-        窗口列表
+        (窗口列表, 窗口总数)，接口未返回 totalNum 时总数为 None
     """
+    key = (page, pageSize)
+    entry = _list_cache.get(key)
+    if entry and time.monotonic() - entry['ts'] < LIST_CACHE_TTL:
+        return entry['data'], entry['total']
+    
     try:
         json_data = {
             "page": page,
             "pageSize": pageSize
         }
-        response = requests.post(
-            f"{url}/browser/list",
-            json=json_data,
-            headers=headers,
-            timeout=10
-        )
-        result = response.json()
+        result = post_json("/browser/list", json_data, timeout=10)
         
         if result.get('success'):
             data = result.get('data', {})
+            total = None
             if isinstance(data, list):
-                return data
+                browsers = data
             elif isinstance(data, dict):
-                return data.get('list', [])
-        return []
+                browsers = data.get('list', [])
+                total = data.get('totalNum')
+            else:
+                return [], None
+            _list_cache[key] = {'ts': time.monotonic(), 'data': browsers, 'total': total, 'index': None}
+            return browsers, total
+        return [], None
     except Exception as e:
         print(f"获取浏览器列表失败: {e}")
-        return []
+        return [], None
+
+
+def get_browser_list(page: int = 0, pageSize: int = 50):
+    """
+    获取所有窗口列表（LIST_CACHE_TTL 秒内重复调用直接返回缓存）
+    
+    Args:
+        page: 页码，默认为0
+        pageSize: 每页数量，默认为50
+    
+    Returns:
+        窗口列表
+    """
+    return get_browser_page(page, pageSize)[0]
 
 
 def get_browser_info(browser_id: str):
@@ -248,10 +306,13 @@ def get_browser_info(browser_id: str):
         窗口信息字典
     """
     browsers = get_browser_list()
-    for browser in browsers:
-        if browser.get('id') == browser_id:
-            return browser
-    return None
+    entry = _list_cache.get((0, 50))
+    if entry is None or entry['data'] is not browsers:
+        return next((b for b in browsers if b.get('id') == browser_id), None)
+    # 同一份缓存列表只建一次 id 索引
+    if entry['index'] is None:
+        entry['index'] = {b.get('id'): b for b in browsers}
+    return entry['index'].get(browser_id)
 
 
 def delete_browsers_by_name(name_pattern: str):
@@ -269,19 +330,9 @@ def delete_browsers_by_name(name_pattern: str):
     
     for browser in browsers:
         if browser.get('name') == name_pattern:
-            browser_id = browser.get('id')
-            try:
-                res = requests.post(
-                    f"{url}/browser/delete",
-                    json={'id': browser_id},
-                    headers=headers,
-                    timeout=10
-                ).json()
-                
-                if res.get('code') == 0 or res.get('success') == True:
-                    deleted_count += 1
-            except Exception:
-                pass
+            # 走同一个删除接口，复用共享 Session 的长连接
+            if delete_browser_by_id(browser.get('id')):
+                deleted_count += 1
     
     return deleted_count
 
@@ -306,7 +357,7 @@ def open_browser_by_id(browser_id: str):
 
 def delete_browser_by_id(browser_id: str):
     """
-    删除指定ID的窗口（使用新API）
+    删除指定ID的窗口（复用共享 Session 的长连接）
     
     Args:
         browser_id: 窗口ID
@@ -315,9 +366,16 @@ def delete_browser_by_id(browser_id: str):
         bool: 是否删除成功
     """
     try:
-        api = get_api()
-        result = api.delete_browser(browser_id)
-        return result['success']
+        res = session.post(
+            f"{url}/browser/delete",
+            json={'id': browser_id},
+            headers=headers,
+            timeout=10
+        ).json()
+        deleted = res.get('code') == 0 or res.get('success') == True
+        if deleted:
+            invalidate_browser_list_cache()
+        return deleted
     except Exception:
         return False
 
@@ -332,25 +390,10 @@ def get_next_window_name(prefix: str):
     Returns:
         下一个窗口名称，如 "美国_1"
     """
-    browsers = get_browser_list()
-    max_num = 0
-    
-    # 遍历所有窗口，找到匹配前缀的最大序号
-    prefix_pattern = f"{prefix}_"
-    for browser in browsers:
-        name = browser.get('name', '')
-        if name == prefix: # 精确匹配前缀（视为序号0或1，视情况而定，这里假设如果不带序号算占用）
-             pass # 简单起见，我们只看带下划线的，或者如果只有前缀，我们从1开始
-             
-        if name.startswith(prefix_pattern):
-            try:
-                # 尝试提取后缀数字
-                suffix = name[len(prefix_pattern):]
-                num = int(suffix)
-                if num > max_num:
-                    max_num = num
-            except:
-                pass
+    # 列表走短时缓存；只认 "前缀_数字" 形式的名称，一次正则匹配取出序号
+    pattern = re.compile(rf'{re.escape(prefix)}_(\d+)')
+    matches = (pattern.fullmatch(browser.get('name') or '') for browser in get_browser_list())
+    max_num = max((int(m.group(1)) for m in matches if m), default=0)
     
     return f"{prefix}_{max_num + 1}"
 
@@ -367,6 +410,11 @@ def open_browser_url(browser_id: str, target_url: str):
             
             if driver_path and debugger_address:
                 try:
+                    # selenium 只有这里用到，批量创建等常规流程不必在导入时加载
+                    from selenium import webdriver
+                    from selenium.webdriver.chrome.options import Options
+                    from selenium.webdriver.chrome.service import Service
+                    
                     chrome_options = Options()
                     chrome_options.add_experimental_option("debuggerAddress", debugger_address)
                     chrome_service = Service(driver_path)
@@ -380,7 +428,155 @@ def open_browser_url(browser_id: str, target_url: str):
         pass
 
 
-def create_browser_window(account: dict, reference_browser_id: str = None, proxy: dict = None, platform: str = None, extra_url: str = None, name_prefix: str = None, template_config: dict = None):
+def index_browsers_by_user() -> dict:
+    """
+    按 userName 建立窗口索引，批量创建前调用一次，查重时 O(1) 查找
+    
+    Returns:
+        {userName: 窗口信息}
+    """
+    return {b.get('userName'): b for b in get_browser_list() if b.get('userName')}
+
+
+# 参考窗口中不能沿用到新窗口的字段
+TEMPLATE_EXCLUDE_FIELDS = frozenset({'id', 'name', 'remark', 'userName', 'password', 'faSecretKey', 'createTime', 'updateTime'})
+# 不使用代理时的代理字段
+NO_PROXY_FIELDS = {'proxyType': 'noproxy', 'proxyMethod': 2, 'host': '', 'port': '', 'proxyUserName': '', 'proxyPassword': ''}
+# 最近一次构建的模板 (参考配置对象, 模板)：批量创建时所有账号共用同一个参考配置对象；
+# 整体作为一个元组替换，多个创建线程并发读写时不会读到配对错误的模板
+_template_cache = (None, None)
+
+
+def build_template(reference_config: dict) -> tuple:
+    """
+    从参考窗口配置构建新窗口的公共部分
+    
+    Args:
+        reference_config: 参考窗口配置
+        
+    Returns:
+        (基础字段字典, 指纹字典)，指纹去掉 id 并固定内核版本为 140
+    """
+    base = {
+        key: value for key, value in reference_config.items()
+        if key not in TEMPLATE_EXCLUDE_FIELDS and key != 'browserFingerPrint'
+    }
+    ref_fp = reference_config.get('browserFingerPrint')
+    fingerprint = {key: value for key, value in ref_fp.items() if key != 'id'} if isinstance(ref_fp, dict) else {}
+    fingerprint['coreVersion'] = '140'
+    fingerprint['version'] = '140'
+    return base, fingerprint
+
+
+def _template_for(reference_config: dict) -> tuple:
+    """同一个参考配置对象只调用一次 build_template"""
+    global _template_cache
+    ref, template = _template_cache
+    if ref is not reference_config:
+        template = build_template(reference_config)
+        _template_cache = (reference_config, template)
+    return template
+
+
+def window_name_prefix(reference_config: dict, name_prefix: str = None) -> str:
+    """
+    确定窗口名称前缀：优先用指定前缀，否则从参考窗口名称推断（去掉末尾 _序号）
+    
+    Args:
+        reference_config: 参考窗口配置
+        name_prefix: 指定的前缀
+        
+    Returns:
+        窗口名称前缀
+    """
+    if name_prefix:
+        return name_prefix
+    ref_name = reference_config.get('name', '')
+    if '_' in ref_name:
+        return '_'.join(ref_name.split('_')[:-1])
+    return ref_name
+
+
+def _verify_account_fields(browser_id: str, account: dict):
+    """
+    回读新窗口，账号/密码/2FA 与预期不一致时用 update/partial 补写（调试用）
+    
+    Args:
+        browser_id: 新建窗口ID
+        account: 账户信息
+    """
+    secret = (account.get('2fa_secret') or '').strip()
+    created_config = get_browser_info(browser_id)
+    need_update = False
+    # 2FA 是否已确认写入：回读结果或 update/partial 的返回里能看到即可，不再额外回读一次
+    twofa_ok = bool(created_config) and created_config.get('faSecretKey') == secret
+    if created_config:
+        if created_config.get('userName') != account['email']:
+            need_update = True
+        if created_config.get('password') != account['password']:
+            need_update = True
+        if secret and not twofa_ok:
+            need_update = True
+    
+    if need_update or not account.get('email'):
+        update_data = {
+            'ids': [browser_id],
+            'userName': account['email'],
+            'password': account['password']
+        }
+        
+        if secret:
+            update_data['faSecretKey'] = secret
+        
+        try:
+            update_res = session.post(
+                f"{url}/browser/update/partial",
+                json=update_data,
+                headers=headers,
+                timeout=10
+            ).json()
+            
+            if update_res.get('success'):
+                # 返回里带了窗口记录就直接比对，没带则以接口成功为准
+                row = update_res.get('data')
+                if isinstance(row, dict) and 'faSecretKey' in row:
+                    twofa_ok = row.get('faSecretKey') == secret
+                else:
+                    twofa_ok = 'faSecretKey' in update_data
+            elif 'faSecretKey' in update_data:
+                retry_data = {
+                    'ids': [browser_id],
+                    'userName': account['email'],
+                    'password': account['password']
+                }
+                session.post(
+                    f"{url}/browser/update/partial",
+                    json=retry_data,
+                    headers=headers,
+                    timeout=10
+                )
+        except Exception:
+            pass
+        invalidate_browser_list_cache()
+    
+    if secret and not twofa_ok:
+        try:
+            twofa_data = {
+                'ids': [browser_id],
+                'faSecretKey': secret
+            }
+            session.post(
+                f"{url}/browser/update/partial",
+                json=twofa_data,
+                headers=headers,
+                timeout=10
+            )
+        except Exception:
+            pass
+        invalidate_browser_list_cache()
+
+
+def create_browser_window(account: dict, reference_browser_id: str = None, proxy: dict = None, platform: str = None, extra_url: str = None, name_prefix: str = None, template_config: dict = None, browsers_by_user: dict = None, verify: bool = False, window_name: str = None, mark_proxy: bool = True):
     """
     创建新的浏览器窗口
     
@@ -392,6 +588,10 @@ def create_browser_window(account: dict, reference_browser_id: str = None, proxy
         extra_url: 额外URL
         name_prefix: 窗口名称前缀
         template_config: 直接提供的模板配置字典 (优先级高于 reference_browser_id)
+        browsers_by_user: index_browsers_by_user() 的结果，批量创建时复用，创建成功后会写入新窗口
+        verify: 创建后回读校验账号字段并按需补写（多 2~4 次请求，默认关闭）
+        window_name: 指定窗口名称（并发创建时预先分配，避免同时取到相同序号）
+        mark_proxy: 是否立即标记代理已使用；批量创建时传 False，由调用方结束后统一批量标记
         
     Returns:
         (browser_id, error_message)
@@ -405,25 +605,12 @@ def create_browser_window(account: dict, reference_browser_id: str = None, proxy
     else:
         return None, "未指定参考窗口ID或模板配置"
     
-    json_data = {}
-    exclude_fields = {'id', 'name', 'remark', 'userName', 'password', 'faSecretKey', 'createTime', 'updateTime'}
-    
-    for key, value in reference_config.items():
-        if key not in exclude_fields:
-            json_data[key] = value
+    # 模板部分同一参考窗口只构建一次，这里只做浅拷贝，不会改动参考配置本身
+    base, fingerprint = _template_for(reference_config)
+    json_data = {**base, 'browserFingerPrint': {**fingerprint}}
     
-    # 确定窗口名称
-    if name_prefix:
-        final_prefix = name_prefix
-    else:
-        # 如果未指定前缀，尝试从参考窗口名称推断
-        ref_name = reference_config.get('name', '')
-        if '_' in ref_name:
-            final_prefix = '_'.join(ref_name.split('_')[:-1])
-        else:
-            final_prefix = ref_name
-            
-    json_data['name'] = get_next_window_name(final_prefix)
+    # 确定窗口名称（并发批量创建时由调用方预先分配）
+    json_data['name'] = window_name or get_next_window_name(window_name_prefix(reference_config, name_prefix))
     
     # 构建备注（格式：email----password----backup_email----2fa_secret，空的留空）
     remark_parts = [
@@ -446,119 +633,40 @@ def create_browser_window(account: dict, reference_browser_id: str = None, proxy
     if account.get('2fa_secret') and account['2fa_secret'].strip():
         json_data['faSecretKey'] = account['2fa_secret'].strip()
     
-    if 'browserFingerPrint' not in json_data:
-        json_data['browserFingerPrint'] = {}
-    
-    if 'browserFingerPrint' in reference_config:
-        ref_fp = reference_config['browserFingerPrint']
-        if isinstance(ref_fp, dict):
-            for key, value in ref_fp.items():
-                if key != 'id':
-                    json_data['browserFingerPrint'][key] = value
-    
-    json_data['browserFingerPrint']['coreVersion'] = '140'
-    json_data['browserFingerPrint']['version'] = '140'
-    
-    if proxy:
-        json_data['proxyType'] = proxy['type']
-        json_data['proxyMethod'] = 2
-        json_data['host'] = proxy['host']
-        json_data['port'] = proxy['port']
-        json_data['proxyUserName'] = proxy['username']
-        json_data['proxyPassword'] = proxy['password']
-    else:
-        json_data['proxyType'] = 'noproxy'
-        json_data['proxyMethod'] = 2
-        json_data['host'] = ''
-        json_data['port'] = ''
-        json_data['proxyUserName'] = ''
-        json_data['proxyPassword'] = ''
+    # 代理字段一次性写入
+    json_data.update({
+        'proxyType': proxy['type'], 'proxyMethod': 2,
+        'host': proxy['host'], 'port': proxy['port'],
+        'proxyUserName': proxy['username'], 'proxyPassword': proxy['password'],
+    } if proxy else NO_PROXY_FIELDS)
     
     
     # 检查是否已存在该账号的窗口
-    all_browsers = get_browser_list()
-    for b in all_browsers:
-        if b.get('userName') == account['email']:
-            return None, f"该账号已有对应窗口: {b.get('name')} (ID: {b.get('id')})"
+    if browsers_by_user is None:
+        browsers_by_user = index_browsers_by_user()
+    b = browsers_by_user.get(account['email'])
+    if b:
+        return None, f"该账号已有对应窗口: {b.get('name')} (ID: {b.get('id')})"
 
     try:
-        # 创建窗口
-        res = requests.post(
-            f"{url}/browser/update",
-            json=json_data,
-            headers=headers,
-            timeout=30
-        ).json()
+        # 创建窗口（并发创建时本地服务可能提示限流，由 post_json 退避重试）
+        res = post_json("/browser/update", json_data, timeout=30)
         
         if res.get('success'):
+            # 列表已变化，后续取名/查重/校验都要看到新窗口
+            invalidate_browser_list_cache()
             browser_id = res.get('data', {}).get('id')
             if not browser_id:
                 return None, "API返回成功但未获取到ID"
+            browsers_by_user[account['email']] = {'id': browser_id, 'name': json_data['name'], 'userName': account['email']}
             
-            created_config = get_browser_info(browser_id)
-            need_update = False
-            if created_config:
-                if created_config.get('userName') != account['email']:
-                    need_update = True
-                if created_config.get('password') != account['password']:
-                    need_update = True
-                if account.get('2fa_secret') and account['2fa_secret'].strip():
-                    if created_config.get('faSecretKey') != account['2fa_secret'].strip():
-                        need_update = True
-            
-            if need_update or 'userName' not in json_data:
-                update_data = {
-                    'ids': [browser_id],
-                    'userName': account['email'],
-                    'password': account['password']
-                }
-                
-                if account.get('2fa_secret') and account['2fa_secret'].strip():
-                    update_data['faSecretKey'] = account['2fa_secret'].strip()
-                
-                try:
-                    update_res = requests.post(
-                        f"{url}/browser/update/partial",
-                        json=update_data,
-                        headers=headers,
-                        timeout=10
-                    ).json()
-                    
-                    if not update_res.get('success'):
-                        if 'faSecretKey' in update_data:
-                            retry_data = {
-                                'ids': [browser_id],
-                                'userName': account['email'],
-                                'password': account['password']
-                            }
-                            requests.post(
-                                f"{url}/browser/update/partial",
-                                json=retry_data,
-                                headers=headers,
-                                timeout=10
-                            )
-                except Exception:
-                    pass
-            
-            if account.get('2fa_secret') and account['2fa_secret'].strip():
-                verify_config = get_browser_info(browser_id)
-                if not (verify_config and verify_config.get('faSecretKey') == account['2fa_secret'].strip()):
-                    try:
-                        twofa_data = {
-                            'ids': [browser_id],
-                            'faSecretKey': account['2fa_secret'].strip()
-                        }
-                        requests.post(
-                            f"{url}/browser/update/partial",
-                            json=twofa_data,
-                            headers=headers,
-                            timeout=10
-                        )
-                    except Exception:
-                        pass
+            # 创建请求里已经带了 userName/password/faSecretKey，默认信任返回结果；
+            # 需要排查字段没写进去时再传 verify=True 回读校验
+            if verify:
+                _verify_account_fields(browser_id, account)
             
             # 如果使用了代理，标记代理已使用
-            if proxy and proxy.get('id'):
+            if mark_proxy and proxy and proxy.get('id'):
                 try:
                     from database import DBManager
                     DBManager.mark_proxy_used(proxy['id'], account['email'])
@@ -583,13 +691,16 @@ def print_browser_info(browser_id: str):
 
 
 def main():
-    accounts_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'accounts.txt')
-    accounts = read_accounts(accounts_file)
+    accounts_file = os.path.join(BASE_DIR, 'accounts.txt')
+    accounts = iter_accounts(accounts_file)
     
-    if not accounts:
+    # 先取出第一条判断是否为空，其余账户边解析边创建
+    first = next(accounts, None)
+    if first is None:
         return
+    accounts = itertools.chain([first], accounts)
     
-    proxies_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'proxies.txt')
+    proxies_file = os.path.join(BASE_DIR, 'proxies.txt')
     proxies = read_proxies(proxies_file)
     
     browsers = get_browser_list()
@@ -602,21 +713,82 @@ def main():
         browsers = get_browser_list()
         if browsers:
             reference_browser_id = browsers[0].get('id')
+            reference_config = browsers[0]
         else:
             return
     
+    results = asyncio.run(_create_all(accounts, proxies, reference_browser_id, reference_config))
     success_count = 0
-    for i, account in enumerate(accounts, 1):
-        proxy = proxies[i - 1] if i - 1 < len(proxies) else None
-        browser_id, error = create_browser_window(account, reference_browser_id, proxy)
+    used_proxies = []
+    for account, proxy, (browser_id, error) in results:
         if browser_id:
             success_count += 1
+            if proxy and proxy.get('id'):
+                used_proxies.append((proxy['id'], account['email']))
         else:
             print(f"窗口创建失败: {error}")
-        if i < len(accounts):
-            time.sleep(1)
     
-    print(f"完成: {success_count}/{len(accounts)}")
+    # 用过的代理最后一次性标记（一个事务），不在每个账号创建后各提交一次
+    if used_proxies:
+        try:
+            from database import DBManager
+            DBManager.mark_proxies_used_bulk(used_proxies)
+        except Exception as e:
+            print(f"[警告] 标记代理已使用失败: {e}")
+    
+    print(f"完成: {success_count}/{len(results)}")
+
+
+# 同时进行的创建请求数上限，过高时本地服务会排队甚至报错
+CREATE_CONCURRENCY = 12
+
+
+async def _create_all(accounts, proxies: list, reference_browser_id: str, reference_config: dict) -> list:
+    """
+    并发创建窗口，信号量限制同时进行的数量
+    
+    accounts 可以是生成器：每解析出一个账户就提交创建，不等整个文件解析完；
+    查重和窗口序号分配都在提交前（事件循环线程内）完成：已有窗口或本批重复的邮箱直接跳过，
+    序号只分配给真正提交创建的账户，并发时既不会重复创建也不会取到同一个名称
+    
+    Returns:
+        与 accounts 顺序一致的 (account, proxy, (browser_id, error_message)) 列表
+    """
+    semaphore = asyncio.Semaphore(CREATE_CONCURRENCY)
+    browsers_by_user = index_browsers_by_user()
+    prefix = window_name_prefix(reference_config)
+    next_num = int(get_next_window_name(prefix).rsplit('_', 1)[1])
+    submitted = set()
+    
+    async def _create(account, proxy, window_name):
+        async with semaphore:
+            result = await asyncio.to_thread(
+                create_browser_window, account, reference_browser_id, proxy,
+                template_config=reference_config, browsers_by_user=browsers_by_user,
+                window_name=window_name, mark_proxy=False
+            )
+        return account, proxy, result
+    
+    async def _skipped(account, proxy, error):
+        return account, proxy, (None, error)
+    
+    tasks = []
+    for i, account in enumerate(accounts):
+        proxy = proxies[i] if i < len(proxies) else None
+        email = account.get('email')
+        b = browsers_by_user.get(email)
+        if b:
+            coro = _skipped(account, proxy, f"该账号已有对应窗口: {b.get('name')} (ID: {b.get('id')})")
+        elif email in submitted:
+            coro = _skipped(account, proxy, f"账号重复: {email}")
+        else:
+            submitted.add(email)
+            coro = _create(account, proxy, f"{prefix}_{next_num}")
+            next_num += 1
+        tasks.append(asyncio.create_task(coro))
+        # 让出一次事件循环，刚提交的任务立即开始，与后续解析重叠
+        await asyncio.sleep(0)
+    return await asyncio.gather(*tasks)
 
 
 if __name__ == "__main__":
@@ -21,7 +21,8 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont, QColor, QIcon
 from create_window import (
     read_accounts, read_proxies, get_browser_list, get_browser_info,
-    delete_browsers_by_name, delete_browser_by_id, open_browser_by_id, create_browser_window, get_next_window_name
+    delete_browsers_by_name, delete_browser_by_id, open_browser_by_id, create_browser_window, get_next_window_name,
+    index_browsers_by_user
 )
 from run_playwright_google import process_browser
 from sheerid_verifier import SheerIDVerifier
@@ -528,8 +529,9 @@ class WorkerThread(QThread):
             if extra_url:
                 self.log(f"[信息] 额外URL: {extra_url}")
             
-            # 为每个账户创建窗口
+            # 为每个账户创建窗口（已有窗口按 userName 建一次索引，逐个查重不再扫列表）
             success_count = 0
+            browsers_by_user = index_browsers_by_user()
             for i, account in enumerate(accounts, 1):
                 if not self.is_running:
                     self.log("\n[用户操作] 创建任务已停止")
@@ -548,7 +550,8 @@ class WorkerThread(QThread):
                     platform=platform_url if platform_url else None,
                     extra_url=extra_url if extra_url else None,
                     template_config=template_config,
-                    name_prefix=name_prefix
+                    name_prefix=name_prefix,
+                    browsers_by_user=browsers_by_user
                 )
                 
                 if browser_id:
@@ -6,11 +6,15 @@
 新代码请使用: from core.database import DBManager
 """
 import sqlite3
+import math
 import os
 import sys
 import threading
+import atexit
 import re
+from collections import Counter
 from datetime import datetime
+from itertools import repeat
 
 # 数据目录路径
 if getattr(sys, 'frozen', False):
@@ -28,21 +32,83 @@ DB_PATH = os.path.join(BASE_DIR, "accounts.db")
 
 lock = threading.Lock()
 
+# 导出防抖：状态变化后延迟该秒数再统一导出，期间的多次变化合并为一次
+EXPORT_DEBOUNCE_SECONDS = 0.5
+
+# 各状态对应的导出文件（link_ready 额外导出一份不带链接的到待验证文件）
+EXPORT_FILES = {
+    "link_ready": "sheerIDlink.txt",
+    "verified": "已验证未绑卡.txt",
+    "subscribed": "已绑卡号.txt",
+    "ineligible": "无资格号.txt",
+    "error": "超时或其他错误.txt"
+}
+EXPORT_PENDING_FILE = "有资格待验证号.txt"
+
+# 账号 upsert 语句：只覆盖非 NULL 字段，status 为空时插入默认 pending_check；
+# 所有字段都与库中一致时不更新（rowcount 为 0），调用方据此只标记真正变化的账号
+_UPSERT_ACCOUNT_SQL = '''
+    INSERT INTO accounts (email, password, recovery_email, secret_key,
+                          verification_link, browser_id, status, message)
+    VALUES (?1, ?2, ?3, ?4, ?5, ?6, COALESCE(?7, 'pending_check'), ?8)
+    ON CONFLICT(email) DO UPDATE SET
+        password = COALESCE(?2, password),
+        recovery_email = COALESCE(?3, recovery_email),
+        secret_key = COALESCE(?4, secret_key),
+        verification_link = COALESCE(?5, verification_link),
+        browser_id = COALESCE(?6, browser_id),
+        status = COALESCE(?7, status),
+        message = COALESCE(?8, message),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE NOT (password IS COALESCE(?2, password)
+               AND recovery_email IS COALESCE(?3, recovery_email)
+               AND secret_key IS COALESCE(?4, secret_key)
+               AND verification_link IS COALESCE(?5, verification_link)
+               AND browser_id IS COALESCE(?6, browser_id)
+               AND status IS COALESCE(?7, status)
+               AND message IS COALESCE(?8, message))
+'''
+
 
 class DBManager:
     """统一数据库管理类"""
     
+    _export_dirty = False
+    _export_full = False
+    _export_emails = set()
+    _export_timer = None
+    _export_index = None
+    _export_stats = {}  # filename -> 本进程最后一次写入后的 (大小, 修改时间)
+    _export_lock = threading.Lock()
+    _shared_conn = None
+    
     @staticmethod
     def get_connection():
         conn = sqlite3.connect(DB_PATH, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        # synchronous 是连接级设置；WAL 下 NORMAL 只在检查点时 fsync，小事务提交不再阻塞在磁盘上
+        conn.execute("PRAGMA synchronous=NORMAL")
         return conn
 
+    @staticmethod
+    def get_shared_connection():
+        """
+        获取长连接（账号 upsert/导出等高频路径复用，调用方需持有 lock，且不要 close）
+        首次打开时启用 WAL（synchronous=NORMAL 已在 get_connection 中设置），写入不再每次 fsync
+        """
+        if DBManager._shared_conn is None:
+            conn = DBManager.get_connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            DBManager._shared_conn = conn
+        return DBManager._shared_conn
+
     @staticmethod
     def init_db():
         """初始化数据库，创建所有表"""
         with lock:
             conn = DBManager.get_connection()
+            # journal_mode=WAL 会持久写入数据库文件，对之后打开的所有连接都生效
+            conn.execute("PRAGMA journal_mode=WAL")
             cursor = conn.cursor()
             
             # ==================== 账号表 ====================
@@ -70,6 +136,9 @@ class DBManager:
                 # SQLite不允许带非常量默认值的ALTER TABLE，只能添加不带默认值的列
                 cursor.execute('ALTER TABLE accounts ADD COLUMN created_at TIMESTAMP')
             
+            # 按状态筛选/排序账号（加载待处理账号、按状态导出）走索引，不再全表扫描
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_accounts_status ON accounts(status)')
+            
             # ==================== 代理表 ====================
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS proxies (
@@ -252,42 +321,75 @@ class DBManager:
             return
             
         try:
+            # 固定的 SQL 文本可命中 sqlite3 的语句缓存，省去 SELECT + 动态 UPDATE 的拼接与重复编译
             with lock:
-                conn = DBManager.get_connection()
-                cursor = conn.cursor()
-                
-                cursor.execute("SELECT * FROM accounts WHERE email = ?", (email,))
-                exists = cursor.fetchone()
-                
-                if exists:
-                    fields = []
-                    values = []
-                    if password is not None: fields.append("password = ?"); values.append(password)
-                    if recovery_email is not None: fields.append("recovery_email = ?"); values.append(recovery_email)
-                    if secret_key is not None: fields.append("secret_key = ?"); values.append(secret_key)
-                    if link is not None: fields.append("verification_link = ?"); values.append(link)
-                    if browser_id is not None: fields.append("browser_id = ?"); values.append(browser_id)
-                    if status is not None: fields.append("status = ?"); values.append(status)
-                    if message is not None: fields.append("message = ?"); values.append(message)
-                    
-                    if fields:
-                        fields.append("updated_at = CURRENT_TIMESTAMP")
-                        values.append(email)
-                        sql = f"UPDATE accounts SET {', '.join(fields)} WHERE email = ?"
-                        cursor.execute(sql, values)
-                else:
-                    cursor.execute('''
-                        INSERT INTO accounts (email, password, recovery_email, secret_key, 
-                                            verification_link, browser_id, status, message)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (email, password, recovery_email, secret_key, link, browser_id, 
-                          status or 'pending_check', message))
-                
-                conn.commit()
-                conn.close()
+                conn = DBManager.get_shared_connection()
+                with conn:
+                    cur = conn.execute(_UPSERT_ACCOUNT_SQL, (email, password, recovery_email, secret_key,
+                                                             link, browser_id, status, message))
+            if cur.rowcount:
+                DBManager._note_accounts_changed((email,))
         except Exception as e:
             print(f"[DB ERROR] upsert_account: {e}")
 
+    @staticmethod
+    def bulk_upsert_accounts(rows, status=None):
+        """
+        批量插入或更新账号（单事务 executemany）
+        
+        Args:
+            rows: (email, password, recovery_email, secret_key, link) 元组序列
+            status: 统一写入的状态
+            
+        Returns:
+            写入的行数
+        """
+        params = [(email, pwd, rec, sec, link, None, status, None)
+                  for email, pwd, rec, sec, link in rows if email]
+        if not params:
+            return 0
+        
+        try:
+            with lock:
+                conn = DBManager.get_shared_connection()
+                with conn:
+                    conn.executemany(_UPSERT_ACCOUNT_SQL, params)
+            DBManager._note_accounts_changed(p[0] for p in params)
+            return len(params)
+        except Exception as e:
+            print(f"[DB ERROR] bulk_upsert_accounts: {e}")
+            return 0
+
+    @staticmethod
+    def bulk_upsert_columns(emails, passwords, recovery_emails, secret_keys, links, statuses):
+        """
+        按列批量插入或更新账号（每行可带不同状态，单事务）
+        
+        各参数为等长列表，直接 zip 成参数行，无需先拼成元组列表；
+        逐行执行同一条（已缓存的）语句，以便按 rowcount 区分哪些行真正发生了变化
+        
+        Returns:
+            实际插入或更新的邮箱列表（与库中一致而被跳过的不在其中）
+        """
+        if not emails:
+            return []
+        
+        nones = repeat(None)
+        params = zip(emails, passwords, recovery_emails, secret_keys, links, nones, statuses, nones)
+        try:
+            changed = []
+            with lock:
+                conn = DBManager.get_shared_connection()
+                with conn:
+                    for row in params:
+                        if conn.execute(_UPSERT_ACCOUNT_SQL, row).rowcount:
+                            changed.append(row[0])
+            DBManager._note_accounts_changed(changed)
+            return changed
+        except Exception as e:
+            print(f"[DB ERROR] bulk_upsert_columns: {e}")
+            return []
+
     @staticmethod
     def update_status(email, status, message=None):
         """更新账号状态"""
@@ -302,6 +404,7 @@ class DBManager:
             cursor.execute('DELETE FROM accounts WHERE email = ?', (email,))
             conn.commit()
             conn.close()
+        DBManager._note_accounts_changed((email,))
 
     @staticmethod
     def get_accounts_by_status(status):
@@ -314,6 +417,17 @@ class DBManager:
             conn.close()
             return [dict(row) for row in rows]
     
+    @staticmethod
+    def fetch_account(browser_id):
+        """按 browser_id 获取账号登录信息（复用长连接，绑卡批量查询时不再每次建连），无记录返回 None"""
+        with lock:
+            conn = DBManager.get_shared_connection()
+            row = conn.execute(
+                "SELECT email, password, recovery_email, secret_key FROM accounts WHERE browser_id = ?",
+                (browser_id,)
+            ).fetchone()
+        return dict(row) if row else None
+    
     @staticmethod
     def get_accounts_without_browser():
         """获取没有browser_id的账号"""
@@ -489,6 +603,27 @@ class DBManager:
             conn.commit()
             conn.close()
     
+    @staticmethod
+    def mark_proxies_used_bulk(used):
+        """
+        批量标记代理已使用（单个事务提交）
+        used 为 [(proxy_id, used_by_email), ...]
+        """
+        used = list(used)
+        if not used:
+            return 0
+        with lock:
+            conn = DBManager.get_connection()
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE proxies 
+                SET is_used = 1, used_by = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [(email, proxy_id) for proxy_id, email in used])
+            conn.commit()
+            conn.close()
+        return len(used)
+    
     @staticmethod
     def delete_proxy(proxy_id):
         """删除代理"""
@@ -644,7 +779,28 @@ class DBManager:
             ''', (card_id,))
             conn.commit()
             conn.close()
-    
+
+    @staticmethod
+    def bulk_increment_card_usage(card_ids):
+        """
+        批量增加卡片使用次数（单个事务提交）
+        card_ids 可以是 id 列表（同一张卡可出现多次，按出现次数累加），也可以是 {id: 次数} 的 Counter
+        """
+        counts = Counter(card_ids)
+        if not counts:
+            return 0
+        with lock:
+            conn = DBManager.get_connection()
+            cursor = conn.cursor()
+            cursor.executemany('''
+                UPDATE cards
+                SET usage_count = usage_count + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', [(n, card_id) for card_id, n in counts.items()])
+            conn.commit()
+            conn.close()
+        return len(counts)
+
     @staticmethod
     def delete_card(card_id):
         """删除卡片"""
@@ -748,66 +904,191 @@ class DBManager:
     # ==================== 导出功能（兼容旧版） ====================
     
     @staticmethod
-    def export_to_files():
-        """将数据库导出为传统文本文件，方便查看"""
-        print("[DB] 开始导出数据库到文本文件...")
+    def mark_export_dirty(emails=None):
+        """
+        标记需要导出，并在防抖时间后合并执行一次导出
         
-        files_map = {
-            "link_ready": "sheerIDlink.txt",
-            "verified": "已验证未绑卡.txt",
-            "subscribed": "已绑卡号.txt",
-            "ineligible": "无资格号.txt",
-            "error": "超时或其他错误.txt"
-        }
+        Args:
+            emails: 发生变化的邮箱；为 None 时下次导出整体重写
+        """
+        with DBManager._export_lock:
+            if emails is None:
+                DBManager._export_full = True
+            else:
+                DBManager._export_emails.update(emails)
+            DBManager._export_dirty = True
+            if DBManager._export_timer is not None:
+                DBManager._export_timer.cancel()
+            timer = threading.Timer(EXPORT_DEBOUNCE_SECONDS, DBManager.flush_exports)
+            timer.daemon = True
+            DBManager._export_timer = timer
+            timer.start()
+    
+    @staticmethod
+    def _note_accounts_changed(emails):
+        """
+        记录经由 DBManager 直接写库的账号（不触发导出）
+        
+        下次增量导出时这些账号会与数据库重新比对，避免内存中的导出索引过期
+        """
+        with DBManager._export_lock:
+            DBManager._export_emails.update(emails)
+    
+    @staticmethod
+    def flush_exports():
+        """立即执行挂起的导出（无挂起时直接返回）"""
+        with DBManager._export_lock:
+            if DBManager._export_timer is not None:
+                DBManager._export_timer.cancel()
+                DBManager._export_timer = None
+            if not DBManager._export_dirty:
+                return
+            changed = None if DBManager._export_full else DBManager._export_emails
+            DBManager._export_dirty = False
+            DBManager._export_full = False
+            DBManager._export_emails = set()
+        DBManager.export_to_files(changed)
+    
+    @staticmethod
+    def _export_entries(row):
+        """计算一条账号记录应导出到哪些文件，返回 [(filename, line), ...]"""
+        st = row['status']
+        if st == 'link_ready':
+            line_acc = DBManager._export_account_line(row)
+            entries = []
+            if row['verification_link']:
+                entries.append((EXPORT_FILES['link_ready'], f"{row['verification_link']}----{line_acc}"))
+            entries.append((EXPORT_PENDING_FILE, line_acc))
+            return entries
+        if st in EXPORT_FILES:
+            return [(EXPORT_FILES[st], DBManager._export_account_line(row))]
+        return []
+    
+    @staticmethod
+    def _export_account_line(row):
+        line_acc = row['email']
+        if row['password']: line_acc += f"----{row['password']}"
+        if row['recovery_email']: line_acc += f"----{row['recovery_email']}"
+        if row['secret_key']: line_acc += f"----{row['secret_key']}"
+        return line_acc
+    
+    @staticmethod
+    def _write_export_file(filename, lines, mode='w'):
+        path = os.path.join(BASE_DIR, filename)
+        with open(path, mode, encoding='utf-8') as f:
+            for l in lines:
+                f.write(l + "\n")
+        st = os.stat(path)
+        DBManager._export_stats[filename] = (st.st_size, st.st_mtime_ns)
+    
+    @staticmethod
+    def _export_file_touched(filename):
+        """导出文件在本进程上次写入之后是否被其它进程改过（或被删除）"""
+        try:
+            st = os.stat(os.path.join(BASE_DIR, filename))
+        except OSError:
+            return True
+        return DBManager._export_stats.get(filename) != (st.st_size, st.st_mtime_ns)
+    
+    @staticmethod
+    def export_to_files(changed=None):
+        """
+        将数据库导出为传统文本文件，方便查看
+        
+        Args:
+            changed: 发生变化的邮箱集合；只改写受影响的文件（纯新增时追加写入）。
+                     为 None 或尚未做过全量导出时，执行 compact() 全量重写
+        """
+        if changed is None or DBManager._export_index is None:
+            DBManager.compact()
+            return
         
-        pending_file = "有资格待验证号.txt"
+        changed = [e for e in changed if e]
+        if not changed:
+            return
         
         try:
             with lock:
-                conn = DBManager.get_connection()
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM accounts")
-                rows = cursor.fetchall()
-                conn.close()
+                conn = DBManager.get_shared_connection()
+                found = {}
+                # 分段查询，避免超出 SQLite 单条语句的参数个数上限
+                for start in range(0, len(changed), 500):
+                    chunk = changed[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    for row in conn.execute(
+                            f"SELECT * FROM accounts WHERE email IN ({placeholders})", chunk):
+                        found[row['email']] = row
                 
-                data = {k: [] for k in files_map.keys()}
-                pending_data = []
+                index = DBManager._export_index
+                appended = {}
+                rewrite = set()
+                for email in changed:
+                    row = found.get(email)
+                    new_entries = dict(DBManager._export_entries(row)) if row else {}
+                    for filename, file_lines in index.items():
+                        old_line = file_lines.get(email)
+                        new_line = new_entries.get(filename)
+                        if old_line == new_line:
+                            continue
+                        if old_line is None:
+                            file_lines[email] = new_line
+                            appended.setdefault(filename, []).append(new_line)
+                            continue
+                        if new_line is None:
+                            del file_lines[email]
+                        else:
+                            file_lines[email] = new_line
+                        rewrite.add(filename)
                 
-                for row in rows:
-                    st = row['status']
-                    if st in ('running', 'processing'):
-                        continue
-                    
-                    email = row['email']
-                    line_acc = email
-                    if row['password']: line_acc += f"----{row['password']}"
-                    if row['recovery_email']: line_acc += f"----{row['recovery_email']}"
-                    if row['secret_key']: line_acc += f"----{row['secret_key']}"
-
-                    if st == 'link_ready':
-                        if row['verification_link']:
-                            line_link = f"{row['verification_link']}----{line_acc}"
-                            data['link_ready'].append(line_link)
-                        pending_data.append(line_acc)
-                    elif st in data:
-                        data[st].append(line_acc)
+                # 要追加的文件已被其它进程改写过时不能直接追加（可能重复写入同一账号），改为重建
+                if rewrite or any(DBManager._export_file_touched(f) for f in appended):
+                    # 按数据库全量重建索引；除本次改动的文件外，重建结果与旧索引不同
+                    # 或被其它进程改写过的文件也一并重写，纠正其它进程（Web 端、新版 GUI）造成的偏差
+                    fresh = DBManager._build_export_index(conn)
+                    DBManager._export_index = fresh
+                    for filename, file_lines in fresh.items():
+                        if (filename in rewrite or filename in appended
+                                or file_lines != index[filename]
+                                or DBManager._export_file_touched(filename)):
+                            rewrite.add(filename)
+                            DBManager._write_export_file(filename, file_lines.values())
+                else:
+                    for filename, lines in appended.items():
+                        DBManager._write_export_file(filename, lines, mode='a')
                 
-                for status, filename in files_map.items():
-                    target_path = os.path.join(BASE_DIR, filename)
-                    lines = data[status]
-                    with open(target_path, 'w', encoding='utf-8') as f:
-                        for l in lines:
-                            f.write(l + "\n")
-                    print(f"[DB] 导出 {len(lines)} 条记录到 {filename}")
+                if rewrite or appended:
+                    print(f"[DB] 增量导出 {len(changed)} 个账号，重写 {len(rewrite)} 个文件")
+        except Exception as e:
+            print(f"[DB ERROR] export_to_files: {e}")
+    
+    @staticmethod
+    def _build_export_index(conn):
+        """从数据库全量构建导出索引 {filename: {email: line}}"""
+        index = {filename: {} for filename in EXPORT_FILES.values()}
+        index[EXPORT_PENDING_FILE] = {}
+        for row in conn.execute("SELECT * FROM accounts"):
+            for filename, line in DBManager._export_entries(row):
+                index[filename][row['email']] = line
+        return index
+    
+    @staticmethod
+    def compact():
+        """全量重写所有导出文件，并重建内存中的导出索引"""
+        print("[DB] 开始导出数据库到文本文件...")
+        
+        try:
+            with lock:
+                conn = DBManager.get_shared_connection()
+                index = DBManager._build_export_index(conn)
                 
-                pending_path = os.path.join(BASE_DIR, pending_file)
-                with open(pending_path, 'w', encoding='utf-8') as f:
-                    for l in pending_data:
-                        f.write(l + "\n")
-                print(f"[DB] 导出 {len(pending_data)} 条记录到 {pending_file}")
+                for filename, file_lines in index.items():
+                    DBManager._write_export_file(filename, file_lines.values())
+                    print(f"[DB] 导出 {len(file_lines)} 条记录到 {filename}")
                 
+                DBManager._export_index = index
                 print("[DB] 导出完成！")
         except Exception as e:
+            DBManager._export_index = None
             print(f"[DB ERROR] export_to_files: {e}")
     
     # ==================== 浏览器同步（从比特浏览器导入账号） ====================
@@ -819,7 +1100,7 @@ class DBManager:
         
         def _run_import():
             try:
-                from create_window import get_browser_list, parse_account_line
+                from create_window import get_browser_page, parse_account_line
                 
                 page = 0
                 page_size = 50
@@ -828,16 +1109,15 @@ class DBManager:
                 
                 print(f"[DB] 开始从浏览器导入 (每页 {page_size} 条)...")
                 
-                while True:
-                    try:
-                        browser_list = get_browser_list(page=page, pageSize=page_size)
-                    except Exception as e:
-                        print(f"[DB] 获取浏览器列表失败(页{page}): {e}")
-                        break
-                        
-                    if not browser_list or len(browser_list) == 0:
-                        break
-                    
+                # 第0页同时返回 totalNum，据此确定总页数，不再多请求一次空页来判断结束
+                try:
+                    browser_list, total = get_browser_page(page=0, pageSize=page_size)
+                except Exception as e:
+                    print(f"[DB] 获取浏览器列表失败(页0): {e}")
+                    browser_list, total = [], None
+                pages = math.ceil(total / page_size) if total is not None else None
+                
+                while browser_list:
                     current_imported = 0
                     current_updated = 0
                     
@@ -917,6 +1197,7 @@ class DBManager:
                                         current_imported += 1
                                     
                                     conn.close()
+                                DBManager._note_accounts_changed((email,))
                             except Exception as e:
                                 print(f"[DB] 处理账号 {email} 出错: {e}")
 
@@ -925,8 +1206,16 @@ class DBManager:
                     print(f"[DB] 第 {page+1} 页处理完成: 新增 {current_imported}, 更新 {current_updated}")
                     
                     page += 1
+                    # 有 totalNum 时按总页数结束；没有则沿用原逻辑，取到空页为止
+                    if pages is not None and page >= pages:
+                        break
                     import time
                     time.sleep(0.5)
+                    try:
+                        browser_list = get_browser_page(page=page, pageSize=page_size)[0]
+                    except Exception as e:
+                        print(f"[DB] 获取浏览器列表失败(页{page}): {e}")
+                        break
                 
                 print(f"[DB] 浏览器导入完成! 新增 {total_imported}, 更新 {total_updated}")
                 
@@ -939,5 +1228,8 @@ class DBManager:
         t.start()
 
 
+# 退出前补齐尚未执行的防抖导出
+atexit.register(DBManager.flush_exports)
+
 # 初始化数据库（模块加载时自动执行）
 # DBManager.init_db()  # 注释掉，由调用方显式初始化
@@ -19,6 +19,7 @@ try:
         deleteBrowser,
         # GUI便捷函数
         get_browser_list_simple,
+        get_all_browsers,
         open_browsers_batch,
         delete_browsers_batch,
         get_browser_info,
@@ -33,7 +34,7 @@ except ImportError as e:
     print(f"[core] 部分模块导入失败: {e}")
     BitBrowserAPI = None
     get_api = openBrowser = closeBrowser = createBrowser = deleteBrowser = None
-    get_browser_list_simple = open_browsers_batch = delete_browsers_batch = None
+    get_browser_list_simple = get_all_browsers = open_browsers_batch = delete_browsers_batch = None
     get_browser_info = get_next_window_name = None
     create_browser_from_account = create_browsers_batch = DEFAULT_BROWSER_TEMPLATE = None
     google_login = None
@@ -48,6 +49,7 @@ __all__ = [
     'createBrowser',
     'deleteBrowser',
     'get_browser_list_simple',
+    'get_all_browsers',
     'open_browsers_batch',
     'delete_browsers_batch',
     'get_browser_info',
@@ -4,6 +4,7 @@
 @details 完全采用数据库存储，提供账号、代理、卡片等数据的统一管理
 """
 import sqlite3
+import math
 import os
 import sys
 import threading
@@ -1267,10 +1268,10 @@ class DBManager:
             try:
                 # 延迟导入避免循环依赖
                 try:
-                    from ..google.backend.create_window import get_browser_list, parse_account_line
+                    from ..google.backend.create_window import get_browser_page, parse_account_line
                 except ImportError:
                     # 兼容旧路径
-                    from create_window import get_browser_list, parse_account_line
+                    from create_window import get_browser_page, parse_account_line
                 
                 page = 0
                 page_size = 50
@@ -1279,16 +1280,15 @@ class DBManager:
                 
                 print(f"[DB] 开始从浏览器导入 (每页 {page_size} 条)...")
                 
-                while True:
-                    try:
-                        browser_list = get_browser_list(page=page, pageSize=page_size)
-                    except Exception as e:
-                        print(f"[DB] 获取浏览器列表失败(页{page}): {e}")
-                        break
-                        
-                    if not browser_list or len(browser_list) == 0:
-                        break
-                    
+                # 第0页同时返回 totalNum，据此确定总页数，不再多请求一次空页来判断结束
+                try:
+                    browser_list, total = get_browser_page(page=0, pageSize=page_size)
+                except Exception as e:
+                    print(f"[DB] 获取浏览器列表失败(页0): {e}")
+                    browser_list, total = [], None
+                pages = math.ceil(total / page_size) if total is not None else None
+                
+                while browser_list:
                     current_imported = 0
                     current_updated = 0
                     
@@ -1377,8 +1377,16 @@ class DBManager:
                     print(f"[DB] 第 {page+1} 页处理完成: 新增 {current_imported}, 更新 {current_updated}")
                     
                     page += 1
+                    # 有 totalNum 时按总页数结束；没有则沿用原逻辑，取到空页为止
+                    if pages is not None and page >= pages:
+                        break
                     import time
                     time.sleep(0.5)
+                    try:
+                        browser_list = get_browser_page(page=page, pageSize=page_size)[0]
+                    except Exception as e:
+                        print(f"[DB] 获取浏览器列表失败(页{page}): {e}")
+                        break
                 
                 print(f"[DB] 浏览器导入完成! 新增 {total_imported}, 更新 {total_updated}")
                 
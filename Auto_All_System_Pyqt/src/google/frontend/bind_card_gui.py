@@ -234,6 +234,7 @@ class BindCardWindow(QWidget):
         self.worker = None
         self.accounts = []
         self.cards = []
+        self._browser_id_to_row = {}  # browser_id -> 表格行号，load_accounts 时建立
         self._init_ui()
         self.load_accounts()
         self.load_cards()
@@ -406,6 +407,7 @@ class BindCardWindow(QWidget):
             
             self.table.setRowCount(0)
             self.accounts = []
+            self._browser_id_to_row = {}
             
             for row in rows:
                 email = row[0]
@@ -427,6 +429,7 @@ class BindCardWindow(QWidget):
                 
                 row_idx = self.table.rowCount()
                 self.table.insertRow(row_idx)
+                self._browser_id_to_row[browser_id] = row_idx
                 
                 checkbox = QCheckBox()
                 checkbox.setChecked(True)
@@ -528,12 +531,12 @@ class BindCardWindow(QWidget):
         QMessageBox.information(self, "完成", "批量绑卡订阅任务已完成")
     
     def _update_account_status(self, browser_id: str, status: str, message: str):
-        """更新表格中的账号状态"""
-        for row in range(self.table.rowCount()):
-            if self.table.item(row, 2) and self.table.item(row, 2).text() == browser_id:
-                self.table.setItem(row, 3, QTableWidgetItem(status))
-                self.table.setItem(row, 4, QTableWidgetItem(message))
-                break
+        """更新表格中的账号状态（按 browser_id 索引直接定位行）"""
+        row = self._browser_id_to_row.get(browser_id)
+        if row is None:
+            return
+        self.table.setItem(row, 3, QTableWidgetItem(status))
+        self.table.setItem(row, 4, QTableWidgetItem(message))
     
     def _log(self, message: str):
         """添加日志"""
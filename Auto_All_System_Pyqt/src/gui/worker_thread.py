@@ -334,14 +334,14 @@ class WorkerThread(QThread):
         
         try:
             import pyotp
-            from core.bit_api import get_browser_list_simple
+            from core.bit_api import get_all_browsers
         except ImportError as e:
             self.log(f"❌ 导入失败: {e}")
             self.finished_signal.emit({'type': '2fa', 'count': 0, 'error': str(e)})
             return
         
         # 获取所有浏览器
-        browsers = get_browser_list_simple(page=0, page_size=1000)
+        browsers = get_all_browsers()
         
         twofa_data = []
         for browser in browsers:
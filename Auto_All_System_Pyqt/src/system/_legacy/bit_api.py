@@ -1,6 +1,8 @@
 import requests
 import json
+import re
 import time
+from requests.adapters import HTTPAdapter
 
 # 官方文档地址
 # https://doc2.bitbrowser.cn/jiekou/ben-di-fu-wu-zhi-nan.html
@@ -10,6 +12,38 @@ import time
 url = "http://127.0.0.1:54345"
 headers = {'Content-Type': 'application/json'}
 
+# 所有本地 API 请求共用一个 Session（连接池 + keep-alive），并发调用时不再每次新建 TCP 连接
+session = requests.Session()
+session.headers['Connection'] = 'keep-alive'
+# 只连本机一个地址，一个连接池即可；maxsize 覆盖批量删除/列表的并发线程数
+# 本地服务不重试，失败直接返回；urllib3 默认已对每个连接开启 TCP_NODELAY，小 JSON 请求不受 Nagle 延迟影响
+_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=0)
+session.mount('http://', _adapter)
+session.mount('https://', _adapter)
+
+# 本地服务限流/繁忙时的提示（或 HTTP 429），只有这种情况才退避重试
+RATE_LIMIT_RE = re.compile(r'频繁|繁忙|稍后|too many|rate limit|busy', re.IGNORECASE)
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF = 0.5  # 首次退避秒数，之后每次翻倍
+
+
+def post_json(endpoint, json_data, timeout=10):
+    """
+    通过共享 Session 发送 POST 并返回解析后的 JSON
+    服务端提示限流时退避重试，其他失败原样返回；请求异常照常抛出，由调用方处理
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        response = session.post(f"{url}{endpoint}", json=json_data, headers=headers, timeout=timeout)
+        if response.status_code == 429:
+            result = {'success': False, 'msg': 'too many requests'}
+        else:
+            result = response.json()
+        if (result.get('success') is False and attempt < RATE_LIMIT_RETRIES
+                and RATE_LIMIT_RE.search(str(result.get('msg', '')))):
+            time.sleep(RATE_LIMIT_BACKOFF * 2 ** attempt)
+            continue
+        return result
+
 
 def createBrowser():  # 创建或者更新窗口，指纹参数 browserFingerPrint 如没有特定需求，只需要指定下内核即可，如果需要更详细的参数，请参考文档
     json_data = {
@@ -27,7 +61,7 @@ def createBrowser():  # 创建或者更新窗口，指纹参数 browserFingerPri
     }
 
     print("正在创建窗口...")
-    res = requests.post(
+    res = session.post(
         f"{url}/browser/update",
         json=json_data,
         headers=headers,
@@ -41,7 +75,7 @@ def createBrowser():  # 创建或者更新窗口，指纹参数 browserFingerPri
 def updateBrowser():  # 更新窗口，支持批量更新和按需更新，ids 传入数组，单独更新只传一个id即可，只传入需要修改的字段即可，比如修改备注，具体字段请参考文档，browserFingerPrint指纹对象不修改，则无需传入
     json_data = {'ids': ['93672cf112a044f08b653cab691216f0'],
                  'remark': '我是一个备注', 'browserFingerPrint': {}}
-    res = requests.post(
+    res = session.post(
         f"{url}/browser/update/partial",
         json=json_data,
         headers=headers
@@ -52,7 +86,7 @@ def updateBrowser():  # 更新窗口，支持批量更新和按需更新，ids 
 def openBrowser(id):  # 直接指定ID打开窗口，也可以使用 createBrowser 方法返回的ID
     json_data = {"id": f'{id}'}
     print(f"正在打开窗口 {id}...")
-    res = requests.post(
+    res = session.post(
         f"{url}/browser/open",
         json=json_data,
         headers=headers,
@@ -65,7 +99,7 @@ def openBrowser(id):  # 直接指定ID打开窗口，也可以使用 createBrows
 def closeBrowser(id):  # 关闭窗口
     json_data = {'id': f'{id}'}
     print(f"正在关闭窗口 {id}...")
-    res = requests.post(
+    res = session.post(
         f"{url}/browser/close",
         json=json_data,
         headers=headers,
@@ -77,7 +111,7 @@ def closeBrowser(id):  # 关闭窗口
 def deleteBrowser(id):  # 删除窗口
     json_data = {'id': f'{id}'}
     print(f"正在删除窗口 {id}...")
-    res = requests.post(
+    res = session.post(
         f"{url}/browser/delete",
         json=json_data,
         headers=headers,
@@ -3,7 +3,84 @@ import time
 import asyncio
 import pyotp
 import re
-from playwright.async_api import async_playwright, Playwright, Page
+import json
+from functools import lru_cache
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, Playwright, Page, TimeoutError as PlaywrightTimeoutError
+
+# 登录各步骤用到的文本/选择器（模块加载时构建一次）
+RECOVERY_OPTION_TEXT = "Confirm your recovery email"
+RECOVERY_INPUT_CSS = 'input[id="knowledge-preregistered-email-response"], input[name="knowledgePreregisteredEmailResponse"]'
+NEXT_BTN_CSS = 'button:has-text("Next"), button:has-text("下一步")'
+TOTP_INPUT_CSS = 'input[name="totpPin"], input[id="totpPin"], input[type="tel"]'
+
+# 登录后安全提醒弹窗的跳过按钮，常见文本: Not now, Cancel, No thanks
+CANCEL_BTN_SELECTORS = (
+    'button:has-text("Not now")',
+    'button:has-text("Cancel")',
+    'button:has-text("No thanks")',
+    'button:has-text("暂不")',
+    'button:has-text("取消")',
+)
+CANCEL_BTN_CSS = ', '.join(CANCEL_BTN_SELECTORS)
+
+# 登录完成后会跳转到的页面（按域名判断；登录页的 continue= 参数里也会带这些地址，不能整串搜索）
+LOGIN_DONE_HOSTS = frozenset({"myaccount.google.com", "one.google.com"})
+# 需要处理的验证步骤：辅助邮箱选项/输入框、2FA 输入框，任一可见即可
+LOGIN_CHALLENGE_CSS = f'{TOTP_INPUT_CSS}, {RECOVERY_INPUT_CSS}, :text("{RECOVERY_OPTION_TEXT}") >> visible=true'
+# 每一步最多等待多久（毫秒）
+LOGIN_STEP_TIMEOUT = 15000
+
+# 一次 evaluate 取回验证步骤的全部状态，代替逐个 count()/is_visible() 往返
+CHECK_JS = """() => {
+    const visible = (el) => !!el && el.getClientRects().length > 0
+        && getComputedStyle(el).visibility !== 'hidden';
+    const anyVisible = (css) => Array.from(document.querySelectorAll(css)).some(visible);
+    const option = document.evaluate(
+        %s, document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return {
+        recovery_option: visible(option),
+        recovery_visible: anyVisible(%s),
+        totp_visible: anyVisible(%s),
+        url: location.href,
+    };
+}""" % (json.dumps(f'//*[normalize-space(text())="{RECOVERY_OPTION_TEXT}"]'), json.dumps(RECOVERY_INPUT_CSS), json.dumps(TOTP_INPUT_CSS))
+
+def _is_login_done(url: str) -> bool:
+    """当前地址是否已是登录完成后的页面: myaccount / one.google.com，或 www.google.com/search"""
+    parsed = urlparse(url)
+    host = parsed.hostname or ''
+    return host in LOGIN_DONE_HOSTS or (host == 'www.google.com' and parsed.path.startswith('/search'))
+
+@lru_cache(maxsize=512)
+def _totp_for(secret: str) -> pyotp.TOTP:
+    """按密钥缓存 TOTP 对象（去掉空格），同一账号重试时不再重复解析 base32 密钥"""
+    return pyotp.TOTP(secret.replace(" ", "").strip())
+
+async def _wait_hidden(locator, timeout=10000):
+    """提交后等待输入框消失（页面已跳到下一步），超时不抛异常"""
+    try:
+        await locator.wait_for(state='hidden', timeout=timeout)
+    except PlaywrightTimeoutError:
+        pass
+
+async def _wait_login_step(page: Page, timeout: int = LOGIN_STEP_TIMEOUT):
+    """
+    同时等待登录成功跳转和验证步骤出现，任一发生立即返回
+    
+    Returns:
+        是否等到了其中之一（False 表示超时，页面没有可处理的内容）
+    """
+    tasks = [
+        asyncio.create_task(page.wait_for_url(_is_login_done, wait_until='commit', timeout=timeout)),
+        asyncio.create_task(page.locator(LOGIN_CHALLENGE_CSS).first.wait_for(timeout=timeout)),
+    ]
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return any(task.exception() is None for task in done)
 
 async def google_login(page: Page, account_info: dict):
     """
@@ -42,7 +119,6 @@ async def google_login(page: Page, account_info: dict):
                         await page.fill('input[type="password"]', password)
                         await page.click('#passwordNext >> button')
                         print("[Login] 密码已提交，等待跳转...")
-                        await asyncio.sleep(5) # 增加等待时间
                     else:
                         print("[Login] 警告: 未提供密码")
                 except:
@@ -53,63 +129,69 @@ async def google_login(page: Page, account_info: dict):
     except Exception as e:
         print(f"[Login] 邮箱/密码步骤可能的异常(或许已登录): {e}")
 
-    # 等待可能的跳转或验证步骤
-    await asyncio.sleep(3)
-
     # 3. 处理各种验证挑战 (循环检测，直到登录成功或超时)
     max_checks = 5
     for i in range(max_checks):
         print(f"[Login] 检查验证步骤 ({i+1}/{max_checks})...")
         
+        # 等待可能的跳转或验证步骤，出现即处理，不再固定等待
+        if not await _wait_login_step(page):
+            print("[Login] 未检测到跳转或验证步骤")
+            break
+        
+        # 一次往返取回当前页面状态，之后只在对应标志为真时才操作
+        try:
+            state = await page.evaluate(CHECK_JS)
+        except Exception as e:
+            print(f"[Login] 页面状态检测出错: {e}")
+            continue
+
         # A. 检测辅助邮箱验证 (Confirm your recovery email)
         try:
             # 情况1: 选择验证方式列表页面
             # 寻找包含 "Confirm your recovery email" 文本的列表项
-            # 根据截图，该文本位于一个 role="link" 的 div 容器内，这是最稳健的点击目标
-            recovery_option = page.locator('div[role="link"]:has-text("Confirm your recovery email")').first
-            
-            # 后备：如果找不到 role="link"，直接找文本
-            if await recovery_option.count() == 0:
-                print("[Login] 未找到 role=link，尝试直接定位文本...")
-                recovery_option = page.locator('text="Confirm your recovery email"').first
-
-            if await recovery_option.count() > 0 and await recovery_option.is_visible():
+            # 根据截图，该文本位于一个 role="link" 的 div 容器内，这是最稳健的点击目标；
+            # 找不到 role="link" 时直接定位文本，两者合并为一次查询
+            if state['recovery_option']:
+                recovery_option = page.get_by_role("link", name=RECOVERY_OPTION_TEXT).or_(
+                    page.get_by_text(RECOVERY_OPTION_TEXT, exact=True)
+                ).first
                 print("[Login] 点击 'Confirm your recovery email' 选项")
                 await recovery_option.hover() # 先悬停
                 await asyncio.sleep(0.5)
                 await recovery_option.click(force=True) # 强制点击
-                await asyncio.sleep(3) # 等待跳转
+                # 等待跳转到辅助邮箱输入页
+                try:
+                    await page.locator(RECOVERY_INPUT_CSS).first.wait_for(timeout=10000)
+                    state['recovery_visible'] = True
+                except PlaywrightTimeoutError:
+                    pass
             
-            # 情况2: 辅助邮箱输入框页面
-            # 特征: 包含提示 "Confirm your recovery email" 或 "Enter recovery email"
-            # 并且有输入框 input[type="email"]
-            if await page.locator("text=Confirm your recovery email").count() > 0 or \
-               await page.locator("text=Enter recovery email").count() > 0:
+            # 情况2: 辅助邮箱输入框页面 (knowledge-preregistered-email-response 输入框可见)
+            if state['recovery_visible']:
+                recovery_input = page.locator(RECOVERY_INPUT_CSS).first
+                print("[Login] 检测到辅助邮箱输入框")
+                backup_email = account_info.get('backup') or account_info.get('backup_email')
                 
-                recovery_input = page.locator('input[id="knowledge-preregistered-email-response"], input[name="knowledgePreregisteredEmailResponse"]')
-                if await recovery_input.count() > 0 and await recovery_input.is_visible():
-                    print("[Login] 检测到辅助邮箱输入框")
-                    backup_email = account_info.get('backup') or account_info.get('backup_email')
-                    
-                    if backup_email:
-                        print(f"[Login] 输入辅助邮箱: {backup_email}")
-                        await recovery_input.fill(backup_email)
-                        # 点击 Next
-                        next_btn = page.locator('button:has-text("Next"), button:has-text("下一步")').first
-                        if await next_btn.count() > 0:
-                            await next_btn.click()
-                        else:
-                            await page.keyboard.press('Enter')
-                        await asyncio.sleep(3)
+                if backup_email:
+                    print(f"[Login] 输入辅助邮箱: {backup_email}")
+                    await recovery_input.fill(backup_email)
+                    # 点击 Next
+                    next_btn = page.locator(NEXT_BTN_CSS).first
+                    if await next_btn.count() > 0:
+                        await next_btn.click()
                     else:
-                        print("[Login] 错误: 需要辅助邮箱但未提供!")
+                        await page.keyboard.press('Enter')
+                    await _wait_hidden(recovery_input)
+                else:
+                    print("[Login] 错误: 需要辅助邮箱但未提供!")
         except Exception as e:
             print(f"[Login] 辅助邮箱检测出错: {e}")
 
         # B. 检测 2FA (TOTP)
         try:
-            totp_input = page.locator('input[name="totpPin"], input[id="totpPin"], input[type="tel"]').first
-            if await totp_input.count() > 0 and await totp_input.is_visible():
+            if state['totp_visible']:
+                totp_input = page.locator(TOTP_INPUT_CSS).first
                 print("[Login] 检测到 2FA 输入框")
                 
                 # 尝试多种可能的键名获取密钥
@@ -117,14 +199,12 @@ async def google_login(page: Page, account_info: dict):
                 
                 if secret:
                     try:
-                        s = secret.replace(" ", "").strip()
-                        totp = pyotp.TOTP(s)
-                        code = totp.now()
+                        code = _totp_for(secret).now()
                         print(f"[Login] 生成并输入 2FA 代码: {code}")
                         await totp_input.fill(code)
                         # 点击 Next
                         await page.click('#totpNext >> button')
-                        await asyncio.sleep(3)
+                        await _wait_hidden(totp_input)
                     except Exception as otp_e:
                         print(f"[Login] TOTP 生成失败: {otp_e}")
                 else:
@@ -132,32 +212,20 @@ async def google_login(page: Page, account_info: dict):
         except Exception as e:
             print(f"[Login] 2FA 检测出错: {e}")
 
-        # 如果已经跳转到非登录相关页面(如myaccount)，则跳出
-        if "myaccount.google.com" in page.url or "google.com/search" in page.url or "one.google.com" in page.url:
+        # 如果已经跳转到非登录相关页面(如myaccount)，则跳出（处理完验证步骤后再判断）
+        if _is_login_done(page.url):
             print("[Login] 已检测到登录成功页面")
             break
-            
-        await asyncio.sleep(2)
 
     # 4. 处理登录后的安全增强提醒 (点击 Cancel / Not now)
     try:
         await asyncio.sleep(2)
-        # 常见按钮文本: Not now, Cancel, No thanks
-        potential_buttons = [
-            'button:has-text("Not now")',
-            'button:has-text("Cancel")',
-            'button:has-text("No thanks")',
-            'button:has-text("暂不")',
-            'button:has-text("取消")'
-        ]
-        
-        for btn_selector in potential_buttons:
-            btn = page.locator(btn_selector).first
-            if await btn.count() > 0 and await btn.is_visible():
-                print(f"[Login] 检测到安全弹窗按钮: {await btn.inner_text()}, 点击跳过...")
-                await btn.click()
-                await asyncio.sleep(1)
-                break
+        # 所有候选按钮合并为一个选择器，一次查询取第一个可见的
+        btn = page.locator(f'{CANCEL_BTN_CSS} >> visible=true').first
+        if await btn.is_visible():
+            print(f"[Login] 检测到安全弹窗按钮: {await btn.inner_text()}, 点击跳过...")
+            await btn.click()
+            await asyncio.sleep(1)
                 
     except Exception as e:
         print(f"[Login] 安全弹窗处理出错(通常可忽略): {e}")
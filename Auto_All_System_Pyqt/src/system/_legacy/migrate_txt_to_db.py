@@ -34,14 +34,9 @@ def migrate():
             with open(path, 'r', encoding='utf-8') as f:
                 lines = [l.strip() for l in f.readlines() if l.strip()]
             
-            count = 0
-            for line in lines:
-                # 使用 AccountManager 的解析逻辑
-                email, pwd, rec, sec, link = AccountManager._parse(line)
-                if email:
-                    # 插入数据库
-                    DBManager.upsert_account(email, pwd, rec, sec, link, status=status)
-                    count += 1
+            # 使用 AccountManager 的解析逻辑，整个文件一次批量写入
+            rows = [AccountManager._parse(line) for line in lines]
+            count = DBManager.bulk_upsert_accounts(rows, status)
             
             print(f"  -> 成功导入 {count} 条数据")
             total_count += count
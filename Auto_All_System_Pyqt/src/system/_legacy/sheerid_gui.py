@@ -46,21 +46,23 @@ class VerifyWorker(QThread):
 
             results = verifier.verify_batch(batch, callback=callback)
             
-            for vid, res in results.items():
-                status = res.get("currentStep") or res.get("status")
-                msg = res.get("message", "")
+            # 同一批结果只落库/导出一次
+            with AccountManager.batch():
+                for vid, res in results.items():
+                    status = res.get("currentStep") or res.get("status")
+                    msg = res.get("message", "")
                 
-                if status == "success":
-                    # Move to verified
-                    for item in self.links:
-                        if item['vid'] == vid:
-                             try:
-                                AccountManager.move_to_verified(item['line'])
-                             except Exception as e:
-                                msg += f" (Move failed: {e})"
-                             break
+                    if status == "success":
+                        # Move to verified
+                        for item in self.links:
+                            if item['vid'] == vid:
+                                 try:
+                                    AccountManager.move_to_verified(item['line'])
+                                 except Exception as e:
+                                    msg += f" (Move failed: {e})"
+                                 break
 
-                self.progress_signal.emit({'vid': vid, 'status': status, 'msg': msg})
+                    self.progress_signal.emit({'vid': vid, 'status': status, 'msg': msg})
                 
         self.finished_signal.emit()
 
@@ -7,8 +7,46 @@
 
 import requests
 import json
+import math
+import re
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, List, Any
 
+# orjson 可选：编解码比标准库 json 快数倍，未安装时回退
+try:
+    import orjson
+    _json_dumps, _json_loads = orjson.dumps, orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+# 本地服务限流/繁忙时的提示（或 HTTP 429），只有这种情况才退避重试
+RATE_LIMIT_RE = re.compile(r'频繁|繁忙|稍后|too many|rate limit|busy', re.IGNORECASE)
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF = 0.5  # 首次退避秒数，之后每次翻倍
+
+# /browser/list 响应缓存时长（秒）：同样的请求体在这段时间内直接复用已解析的结果
+LIST_CACHE_TTL = 5
+
+
+def _copy_list_result(result: Dict) -> Dict:
+    """
+    @brief 浅拷贝列表响应（外层字典、data 与窗口列表），调用方增删改不会污染缓存
+    @param result /browser/list 响应
+    @return 拷贝后的响应
+    """
+    data = result.get('data')
+    if isinstance(data, list):
+        data = list(data)
+    elif isinstance(data, dict) and isinstance(data.get('list'), list):
+        data = {**data, 'list': list(data['list'])}
+    return {**result, 'data': data}
+
 
 class BitBrowserAPI:
     """
@@ -24,28 +62,75 @@ class BitBrowserAPI:
         """
         self.base_url = base_url
         self.headers = {'Content-Type': 'application/json'}
+        # 复用连接池（keep-alive），多线程并发调用时不再每次新建 TCP 连接
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        # urllib3 默认已对每个连接开启 TCP_NODELAY，本地小 JSON 请求不受 Nagle 延迟影响
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # 请求体 -> (获取时间, 响应)，只缓存 /browser/list，其他接口调用时清空
+        self._list_cache: Dict[bytes, tuple] = {}
+        self._list_cache_lock = threading.Lock()
     
     def _request(self, endpoint: str, data: Optional[Dict] = None, timeout: int = 30) -> Dict[str, Any]:
         """
-        @brief 发送POST请求
+        @brief 发送POST请求（/browser/list 在 LIST_CACHE_TTL 秒内相同请求直接返回缓存）
         @param endpoint API端点
         @param data 请求数据（dict）
         @param timeout 超时时间（秒）
         @return 响应JSON
         """
+        body = _json_dumps(data if data else {})
+        if endpoint != "/browser/list":
+            # 可能是写操作，之前缓存的列表不再可信
+            with self._list_cache_lock:
+                self._list_cache.clear()
+            return self._post(endpoint, body, timeout)
+        
+        with self._list_cache_lock:
+            cached = self._list_cache.get(body)
+        if cached and time.monotonic() - cached[0] < LIST_CACHE_TTL:
+            return _copy_list_result(cached[1])
+        result = self._post(endpoint, body, timeout)
+        if result.get('success'):
+            with self._list_cache_lock:
+                self._list_cache[body] = (time.monotonic(), result)
+            return _copy_list_result(result)
+        return result
+    
+    def _post(self, endpoint: str, body: bytes, timeout: int) -> Dict[str, Any]:
+        """
+        @brief 发送已序列化的POST请求，服务端提示限流时退避重试
+        @param endpoint API端点
+        @param body JSON请求体
+        @param timeout 超时时间（秒）
+        @return 响应JSON
+        """
         url = f"{self.base_url}{endpoint}"
-        try:
-            response = requests.post(
-                url,
-                json=data if data else {},
-                headers=self.headers,
-                timeout=timeout
-            )
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            return {"success": False, "msg": f"请求失败: {str(e)}"}
-        except json.JSONDecodeError:
-            return {"success": False, "msg": "响应JSON解析失败"}
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                response = self.session.post(
+                    url,
+                    data=body,
+                    headers=self.headers,
+                    timeout=timeout
+                )
+                if response.status_code == 429:
+                    result = {"success": False, "msg": "too many requests"}
+                else:
+                    result = _json_loads(response.content)
+            except requests.exceptions.RequestException as e:
+                return {"success": False, "msg": f"请求失败: {str(e)}"}
+            except json.JSONDecodeError:
+                return {"success": False, "msg": "响应JSON解析失败"}
+            
+            # 服务端明确提示限流时才等待重试，其他失败原样返回
+            if (result.get('success') is False and attempt < RATE_LIMIT_RETRIES
+                    and RATE_LIMIT_RE.search(str(result.get('msg', '')))):
+                time.sleep(RATE_LIMIT_BACKOFF * 2 ** attempt)
+                continue
+            return result
     
     # ==================== 健康检查 ====================
     
@@ -229,6 +314,25 @@ class BitBrowserAPI:
         
         return self._request("/browser/list", data)
     
+    async def alist_browsers(self, http, page: int = 0, page_size: int = 100) -> Dict:
+        """
+        @brief 分页获取浏览器窗口列表（异步版，供并发翻页使用）
+        @param http aiohttp.ClientSession，同一批翻页共用一个连接池
+        @param page 页码，从0开始
+        @param page_size 每页数量，最大100
+        @return 窗口列表
+        """
+        data = {
+            "page": page,
+            "pageSize": min(page_size, 100),
+            "sort": "desc"
+        }
+        try:
+            async with http.post(f"{self.base_url}/browser/list", json=data, headers=self.headers) as response:
+                return await response.json(content_type=None)
+        except Exception as e:
+            return {"success": False, "msg": f"请求失败: {str(e)}"}
+    
     def arrange_windows(self,
                        window_type: str = "box",
                        start_x: int = 0,
@@ -645,6 +749,64 @@ def get_browser_list_simple(page: int = 0, page_size: int = 1000) -> List[Dict]:
     return []
 
 
+# 列表接口单页上限
+LIST_PAGE_SIZE = 100
+
+
+async def _aget_all_browsers() -> List[Dict]:
+    """
+    @brief 先取第0页拿到 totalNum，其余页并发请求
+    @return 浏览器列表（按页顺序拼接）
+    """
+    import aiohttp
+    
+    api = get_api()
+    connector = aiohttp.TCPConnector(limit=16, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=30)) as http:
+        first = await api.alist_browsers(http, 0, LIST_PAGE_SIZE)
+        if not first.get('success'):
+            return []
+        data = first.get('data', {})
+        if isinstance(data, list):
+            return data
+        
+        browsers = list(data.get('list', []))
+        total = data.get('totalNum')
+        if total is None:
+            # 接口未返回 totalNum 时退回逐页读取，取到不足一页为止
+            page, last = 1, browsers
+            while len(last) >= LIST_PAGE_SIZE:
+                result = await api.alist_browsers(http, page, LIST_PAGE_SIZE)
+                last = result.get('data', {}).get('list', []) if result.get('success') else []
+                browsers.extend(last)
+                page += 1
+            return browsers
+        
+        pages = math.ceil(int(total) / LIST_PAGE_SIZE)
+        results = await asyncio.gather(*[
+            api.alist_browsers(http, page, LIST_PAGE_SIZE) for page in range(1, pages)
+        ])
+        for result in results:
+            if result.get('success'):
+                browsers.extend(result.get('data', {}).get('list', []))
+        return browsers
+
+
+def get_all_browsers() -> List[Dict]:
+    """
+    @brief 获取全部浏览器窗口（同步包装，供GUI线程调用）
+    @details 接口单页最多100条，逐页翻页要等 N 次往返；这里第0页之后的页并发请求
+             当前线程已有运行中的事件循环时不能再 asyncio.run，改在临时线程里执行
+    @return 浏览器列表
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_aget_all_browsers())
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _aget_all_browsers()).result()
+
+
 def open_browsers_batch(browser_ids: List[str], callback=None) -> tuple:
     """
     @brief 批量打开浏览器
@@ -705,25 +867,18 @@ def get_browser_info(browser_id: str) -> Optional[Dict]:
     return None
 
 
-def get_next_window_name(prefix: str) -> str:
+def get_next_window_name(prefix: str, browsers: Optional[List[Dict]] = None) -> str:
     """
     @brief 根据前缀生成下一个窗口名称，格式：前缀_序号
     @param prefix 窗口名称前缀
+    @param browsers 已获取的窗口列表（批量创建时复用），为None时重新获取
     @return 下一个窗口名称
     """
-    browsers = get_browser_list_simple(page=0, page_size=1000)
-    
-    max_num = 0
-    for b in browsers:
-        name = b.get('name', '')
-        if name.startswith(f"{prefix}_"):
-            try:
-                num_part = name[len(prefix)+1:]
-                num = int(num_part)
-                if num > max_num:
-                    max_num = num
-            except ValueError:
-                pass
+    if browsers is None:
+        browsers = get_all_browsers()
+    pattern = re.compile(rf'{re.escape(prefix)}_(\d+)')
+    matches = (pattern.fullmatch(b.get('name') or '') for b in browsers)
+    max_num = max((int(m.group(1)) for m in matches if m), default=0)
     
     return f"{prefix}_{max_num + 1}"
 
@@ -819,7 +974,8 @@ def create_browser_from_account(
     template_id: Optional[str] = None,
     proxy: Optional[Dict] = None,
     platform_url: str = "",
-    extra_url: str = ""
+    extra_url: str = "",
+    browsers: Optional[List[Dict]] = None
 ) -> tuple:
     """
     @brief 根据账号创建浏览器窗口
@@ -830,9 +986,12 @@ def create_browser_from_account(
     @param proxy 代理信息字典，需包含type, host, port, username, password
     @param platform_url 平台URL
     @param extra_url 额外URL
+    @param browsers 已获取的窗口列表（批量创建时复用，创建成功后会追加新窗口），为None时重新获取
     @return (browser_id, error_message)
     """
     api = get_api()
+    if browsers is None:
+        browsers = get_all_browsers()
     
     # 确定模板配置
     if template_config:
@@ -857,7 +1016,7 @@ def create_browser_from_account(
             json_data[key] = value
     
     # 设置窗口名称
-    json_data['name'] = get_next_window_name(name_prefix)
+    json_data['name'] = get_next_window_name(name_prefix, browsers)
     
     # 设置备注（格式：email----password----backup_email----2fa_secret）
     email = account.get('email') or ''
@@ -900,7 +1059,6 @@ def create_browser_from_account(
         json_data['proxyMethod'] = 2
     
     # 检查是否已存在该账号的窗口
-    browsers = get_browser_list_simple(page=0, page_size=1000)
     for b in browsers:
         if b.get('userName') == email and email:
             return None, f"该账号已有对应窗口: {b.get('name')} (ID: {b.get('id')})"
@@ -913,6 +1071,8 @@ def create_browser_from_account(
             browser_id = result.get('data', {}).get('id')
             if not browser_id:
                 return None, "API返回成功但未获取到ID"
+            # 同一批次后续账号的查重和取名要能看到新窗口
+            browsers.append({'id': browser_id, 'name': json_data['name'], 'userName': email})
             return browser_id, None
         else:
             return None, result.get('msg', '创建失败')
@@ -946,6 +1106,8 @@ def create_browsers_batch(
     """
     success_count = 0
     proxy_index = 0
+    # 窗口列表整批只取一次，查重和取名都复用同一份
+    browsers = get_all_browsers()
     
     for i, account in enumerate(accounts):
         # 检查停止标志
@@ -966,7 +1128,8 @@ def create_browsers_batch(
             template_id=template_id,
             proxy=proxy,
             platform_url=platform_url,
-            extra_url=extra_url
+            extra_url=extra_url,
+            browsers=browsers
         )
         
         if browser_id:
@@ -82,7 +82,7 @@ class MainWindow(QMainWindow):
             DBManager.init_db()
         except ImportError:
             try:
-                _legacy_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '_legacy')
+                _legacy_dir = os.path.join(_src_dir, '_legacy')
                 if _legacy_dir not in sys.path:
                     sys.path.insert(0, _legacy_dir)
                 from database import DBManager
@@ -585,10 +585,10 @@ class MainWindow(QMainWindow):
         """刷新浏览器列表"""
         self.log("正在刷新窗口列表...")
         try:
-            from core.bit_api import get_browser_list_simple
+            from core.bit_api import get_all_browsers
             from core.database import DBManager
             
-            browsers = get_browser_list_simple(page=0, page_size=1000)
+            browsers = get_all_browsers()
             
             # 获取所有账号状态
             accounts = {acc['browser_id']: acc for acc in DBManager.get_all_accounts() if acc.get('browser_id')}
@@ -646,9 +646,9 @@ class MainWindow(QMainWindow):
         
         try:
             import pyotp
-            from core.bit_api import get_browser_list_simple
+            from core.bit_api import get_all_browsers
             
-            browsers = get_browser_list_simple(page=0, page_size=1000)
+            browsers = get_all_browsers()
             
             # 收集2FA信息
             twofa_data = []
@@ -683,7 +683,7 @@ class MainWindow(QMainWindow):
             from datetime import datetime
             
             # 获取数据目录
-            data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+            data_dir = os.path.join(_src_dir, 'data')
             os.makedirs(data_dir, exist_ok=True)
             
             # 生成文件名